@@ -0,0 +1,19 @@
+from django.middleware.gzip import GZipMiddleware
+
+
+class DataAPIGZipMiddleware(GZipMiddleware):
+    """
+    Gzip the responses of the data sync API only.
+
+    Sync snapshots are large and highly repetitive, which matters for the
+    app on slow mobile networks. HTML pages are left alone because they
+    embed CSRF tokens (BREACH).
+    """
+
+    namespace = "data_v1"
+
+    def process_response(self, request, response):
+        match = getattr(request, "resolver_match", None)
+        if match is None or self.namespace not in match.namespaces:
+            return response
+        return super().process_response(request, response)
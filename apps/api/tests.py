@@ -0,0 +1,104 @@
+import json
+from decimal import Decimal
+
+from rest_framework import serializers as drf_serializers
+from rest_framework.renderers import JSONRenderer
+
+from apps.api.v1.data import serializers
+from apps.api.v1.data.rows import ValuesSerializer
+from apps.core.testing import OrganizationTestCase, create_sale, create_stock
+from apps.orders import models as order_models
+
+
+class LedgerEntrySerializer(drf_serializers.ModelSerializer):
+    # Crosses the nullable ``facturation`` relation.
+    bill_number = drf_serializers.CharField(
+        source="facturation.bill_number", read_only=True
+    )
+    customer_name = drf_serializers.CharField(source="customer.name", read_only=True)
+
+    class Meta:
+        model = order_models.CustomerLedgerEntry
+        fields = ["id", "kind", "amount", "bill_number", "customer_name"]
+
+
+def render(data):
+    """The JSON the client receives, with lists of objects ordered by id."""
+
+    def normalize(value):
+        if isinstance(value, dict):
+            return {key: normalize(item) for key, item in value.items()}
+        if isinstance(value, list):
+            items = [normalize(item) for item in value]
+            if all(isinstance(item, dict) and "id" in item for item in items):
+                items.sort(key=lambda item: item["id"])
+            return items
+        return value
+
+    return normalize(json.loads(JSONRenderer().render(data)))
+
+
+class ValuesSerializerParityTests(OrganizationTestCase):
+    """The values() rows of the sync lists match the DRF serializers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        stock = create_stock(cls.organization_user)
+        for quantity in (1, 3):
+            create_sale(
+                cls.organization_user,
+                cls.customer,
+                [(stock, quantity)],
+                paid=Decimal(2),
+            )
+        order_models.CustomerLedgerEntry.post(
+            [
+                order_models.CustomerLedgerEntry(
+                    organization=cls.organization,
+                    customer=cls.customer,
+                    kind=order_models.LedgerEntryKind.PREPAID,
+                    amount=Decimal(10),
+                )
+            ]
+        )
+
+    def assertParity(self, serializer_class, queryset):
+        expected = render(serializer_class(queryset, many=True).data)
+        actual = render(
+            [
+                row
+                for chunk in ValuesSerializer(serializer_class).iter_chunks(
+                    queryset, chunk_size=2
+                )
+                for row in chunk
+            ]
+        )
+        self.assertTrue(expected)
+        self.assertEqual(actual, expected)
+
+    def test_stocks(self):
+        self.assertParity(
+            serializers.StockSerializer,
+            order_models.Stock.objects.filter(organization=self.organization),
+        )
+
+    def test_sales_with_lines_and_payments(self):
+        self.assertParity(
+            serializers.FacturationSerializer,
+            order_models.Facturation.objects.filter(organization=self.organization),
+        )
+
+    def test_null_relation_leaves_the_key_out(self):
+        entries = order_models.CustomerLedgerEntry.objects.filter(
+            customer=self.customer
+        )
+        self.assertParity(LedgerEntrySerializer, entries)
+
+        prepaid = render(
+            LedgerEntrySerializer(
+                entries.get(kind=order_models.LedgerEntryKind.PREPAID)
+            ).data
+        )
+        self.assertNotIn("bill_number", prepaid)
+        self.assertEqual(prepaid["customer_name"], "Client")
@@ -0,0 +1,97 @@
+import hashlib
+import re
+import uuid
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.db import connections
+from django.db.models import Count, TextField, Value
+from django.db.models.functions import MD5, Cast, Left, Replace
+from rest_framework.exceptions import ValidationError
+
+HEX_PREFIX = re.compile(r"^[0-9a-f]{0,31}$")
+LEAF_SIZE = 256
+
+# ``uuid.hex`` of the primary key, and the MD5 of those of a group in
+# ascending order, as PostgreSQL computes them.
+HEX_ID = Replace(Cast("id", TextField()), Value("-"), Value(""))
+HEX_IDS_MD5 = MD5(StringAgg(HEX_ID, delimiter="", ordering="id"))
+
+
+def parse_prefix(value):
+    """Validate a client supplied UUID hex prefix ("" is the root range)."""
+    prefix = (value or "").replace("-", "").lower()
+    if not HEX_PREFIX.match(prefix):
+        raise ValidationError({"prefix": "Expected up to 31 hexadecimal digits."})
+    return prefix
+
+
+def hash_ids(ids):
+    digest = hashlib.md5()
+    for pk in ids:
+        digest.update(pk.hex.encode("ascii"))
+    return digest.hexdigest()
+
+
+def database_buckets(ids, depth):
+    """The buckets of ``ids``, counted and hashed by PostgreSQL."""
+    return [
+        {"prefix": bucket["bucket"], "count": bucket["count"], "hash": bucket["hash"]}
+        for bucket in ids.annotate(bucket=Left(HEX_ID, depth))
+        .values("bucket")
+        .annotate(count=Count("id"), hash=HEX_IDS_MD5)
+        .order_by("bucket")
+    ]
+
+
+def stream_buckets(ids, depth):
+    """The buckets and the hash of ``ids``, streaming them into Python."""
+    digest = hashlib.md5()
+    buckets = {}
+    for pk in ids.values_list("id", flat=True).iterator(chunk_size=2000):
+        value = pk.hex.encode("ascii")
+        digest.update(value)
+        key = pk.hex[:depth]
+        if key not in buckets:
+            buckets[key] = {"prefix": key, "count": 0, "hash": hashlib.md5()}
+        buckets[key]["count"] += 1
+        buckets[key]["hash"].update(value)
+    buckets = [
+        {**bucket, "hash": bucket["hash"].hexdigest()} for bucket in buckets.values()
+    ]
+    return buckets, digest.hexdigest()
+
+
+def id_range_digest(queryset, prefix="", leaf_size=LEAF_SIZE):
+    """
+    Hash the primary keys of ``queryset`` starting with ``prefix``.
+
+    The range is split into 16 buckets on the next hex digit. Every bucket
+    (and the range itself) is summarized by its row count and the MD5 of the
+    ascending ``uuid.hex`` values, so a client only drills down into buckets
+    whose digest differs from its own. Ranges holding at most ``leaf_size``
+    rows also return their ids so the client can diff them.
+
+    On PostgreSQL the ids never leave the database, except those of a leaf.
+    """
+    low = uuid.UUID(prefix.ljust(32, "0"))
+    high = uuid.UUID(prefix.ljust(32, "f"))
+    ids = queryset.filter(id__gte=low, id__lte=high).order_by("id")
+
+    depth = len(prefix) + 1
+    if connections[ids.db].vendor == "postgresql":
+        buckets = database_buckets(ids, depth)
+        digest = None
+    else:
+        buckets, digest = stream_buckets(ids, depth)
+    count = sum(bucket["count"] for bucket in buckets)
+
+    response = {"prefix": prefix, "count": count}
+    if count <= leaf_size:
+        response["ids"] = list(ids.values_list("id", flat=True))
+        response["hash"] = hash_ids(response["ids"])
+    else:
+        if digest is None:
+            digest = ids.order_by().aggregate(hash=HEX_IDS_MD5)["hash"]
+        response["hash"] = digest
+        response["buckets"] = buckets
+    return response
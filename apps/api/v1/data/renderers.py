@@ -0,0 +1,49 @@
+from rest_framework.renderers import JSONRenderer
+
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def to_columns(data):
+    """
+    Turn every list of objects in ``data`` into a column table.
+
+    ``[{"a": 1, "b": "x"}, {"a": 2, "b": "x"}]`` becomes
+    ``{"columns": ["a"], "constants": {"b": "x"}, "rows": [[1], [2]]}``:
+    keys are sent once and columns holding the same scalar on every row
+    (organization slug, user name, ...) are sent once in ``constants``.
+    """
+    if isinstance(data, dict):
+        return {key: to_columns(value) for key, value in data.items()}
+    if not isinstance(data, list):
+        return data
+    if not data or not all(isinstance(row, dict) for row in data):
+        return [to_columns(value) for value in data]
+
+    keys = list(dict.fromkeys(key for row in data for key in row))
+    constants = {}
+    if len(data) > 1:
+        for key in keys:
+            first = data[0].get(key)
+            if isinstance(first, SCALAR_TYPES) and all(
+                key in row and row[key] == first for row in data
+            ):
+                constants[key] = first
+    columns = [key for key in keys if key not in constants]
+    return {
+        "columns": columns,
+        "constants": constants,
+        "rows": [[to_columns(row.get(key)) for key in columns] for row in data],
+    }
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    Compact encoding of the sync payloads, negotiated with
+    ``Accept: application/vnd.distrivite.columnar+json`` or ``?format=columnar``.
+    """
+
+    media_type = "application/vnd.distrivite.columnar+json"
+    format = "columnar"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(to_columns(data), accepted_media_type, renderer_context)
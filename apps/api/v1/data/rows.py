@@ -0,0 +1,132 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+
+
+class ValuesSerializer:
+    """
+    Serialize a queryset from ``values()`` rows instead of model instances.
+
+    The column map is built once from a DRF serializer: every field becomes a
+    ``values()`` lookup (``batch.item.name`` -> ``batch__item__name``) and
+    keeps its own ``to_representation``, so the rows have the same keys,
+    order and formatting as the DRF output, including the keys DRF leaves
+    out behind a null relation. Nested ``many=True`` serializers
+    on reverse foreign keys are loaded with one extra query per chunk.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.columns = []
+        self.nested = []
+
+        for name, field in serializer.fields.items():
+            if isinstance(field, serializers.ListSerializer):
+                relation = self.model._meta.get_field(field.source)
+                self.nested.append(
+                    (
+                        name,
+                        relation.related_model._default_manager,
+                        relation.field.attname,
+                        ValuesSerializer(type(field.child)),
+                    )
+                )
+            elif isinstance(field, serializers.SerializerMethodField) or (
+                field.source == "*"
+            ):
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{name} cannot be read from values()."
+                )
+            else:
+                lookup = field.source.replace(".", "__")
+                self.columns.append(
+                    (
+                        name,
+                        lookup,
+                        self.get_nullable_relations(field.source),
+                        self.get_converter(field),
+                    )
+                )
+
+        self.lookups = list(
+            dict.fromkeys(
+                [
+                    "pk",
+                    *(lookup for _, lookup, _, _ in self.columns),
+                    *(
+                        relation
+                        for _, _, relations, _ in self.columns
+                        for relation in relations
+                    ),
+                ]
+            )
+        )
+
+    def get_nullable_relations(self, source):
+        """
+        The ``values()`` lookups of the nullable relations crossed by a dotted
+        ``source``: DRF leaves the key out when one of them is null, where
+        ``values()`` would only give ``None``.
+        """
+        relations = []
+        model = self.model
+        parts = source.split(".")
+        for index, part in enumerate(parts[:-1]):
+            field = model._meta.get_field(part)
+            if field.null:
+                relations.append("__".join(parts[: index + 1]))
+            model = field.related_model
+        return relations
+
+    @staticmethod
+    def get_converter(field):
+        if isinstance(field, serializers.ReadOnlyField):
+            return None
+        return field.to_representation
+
+    def to_representation(self, row):
+        data = {}
+        for name, lookup, relations, convert in self.columns:
+            if any(row[relation] is None for relation in relations):
+                continue
+            value = row[lookup]
+            if value is not None and convert is not None:
+                value = convert(value)
+            data[name] = value
+        return data
+
+    def serialize(self, rows):
+        """Serialize ``values()`` dicts, loading their nested lists."""
+        children = {}
+        for name, manager, attname, child in self.nested:
+            grouped = defaultdict(list)
+            child_rows = list(
+                manager.filter(
+                    **{f"{attname}__in": [row["pk"] for row in rows]}
+                ).values(*dict.fromkeys([attname, *child.lookups]))
+            )
+            for child_row, child_data in zip(child_rows, child.serialize(child_rows)):
+                grouped[child_row[attname]].append(child_data)
+            children[name] = grouped
+
+        data = []
+        for row in rows:
+            item = self.to_representation(row)
+            for name in children:
+                item[name] = children[name].get(row["pk"], [])
+            data.append(item)
+        return data
+
+    def iter_chunks(self, queryset, chunk_size=500):
+        """Yield the serialized rows of ``queryset`` ``chunk_size`` at a time."""
+        rows = (
+            queryset.prefetch_related(None)
+            .values(*self.lookups)
+            .iterator(chunk_size=chunk_size)
+        )
+        while chunk := list(islice(rows, chunk_size)):
+            yield self.serialize(chunk)
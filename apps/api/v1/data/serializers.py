@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from django.db import transaction
 from rest_framework import serializers
 
@@ -208,6 +210,67 @@ class FacturationStockSerializer(serializers.ModelSerializer):
         ]
 
 
+def bulk_create_facturation_lines(facturation, stock_data, payment_data):
+    """
+    Insert the lines of a new facturation with one query per table.
+
+    The created rows are attached to ``facturation`` as its prefetched
+    relations, together with their stocks and organization, so serializing
+    the result does not query the database once per line. The facturation
+    totals are then recomputed in one UPDATE.
+    """
+    stocks = order_models.Stock.objects.select_related("batch__item").in_bulk(
+        {item["stock_id"] for item in stock_data}
+    )
+    facturation_stocks = order_models.FacturationStock.objects.bulk_create(
+        [
+            order_models.FacturationStock(facturation=facturation, **item)
+            for item in stock_data
+        ]
+    )
+    facturation_payments = order_models.FacturationPayment.objects.bulk_create(
+        [
+            order_models.FacturationPayment(facturation=facturation, **pay)
+            for pay in payment_data
+        ]
+    )
+
+    for line in facturation_stocks:
+        if line.stock_id in stocks:
+            line.stock = stocks[line.stock_id]
+    for line in [*facturation_stocks, *facturation_payments]:
+        if line.organization_id == facturation.organization_id:
+            line.organization = facturation.organization
+
+    facturation._prefetched_objects_cache = {
+        "facturation_stocks": facturation_stocks,
+        "facturation_payments": facturation_payments,
+    }
+    order_models.Facturation.update_totals(
+        order_models.Facturation.objects.filter(pk=facturation.pk),
+        facturation.organization_id,
+    )
+    return facturation_stocks
+
+
+def decrement_stocks(facturation, facturation_stocks, kind):
+    """
+    Take the quantities of ``facturation_stocks`` out of their stocks, in a
+    single UPDATE journaled as ``kind`` movements of ``facturation``.
+    """
+    deltas = defaultdict(int)
+    for line in facturation_stocks:
+        deltas[line.stock_id] -= line.quantity
+
+    order_models.Stock.move(
+        deltas,
+        kind,
+        facturation.organization_id,
+        organization_user_id=facturation.organization_user_id,
+        facturation_id=facturation.pk,
+    )
+
+
 class FacturationSerializer(serializers.ModelSerializer):
     facturation_stocks = FacturationStockSerializer(many=True, required=False)
     facturation_payments = FacturationPaymentSerializer(many=True, required=False)
@@ -258,21 +321,14 @@ class FacturationSerializer(serializers.ModelSerializer):
 
         with transaction.atomic():
             billing = order_models.Facturation.objects.create(**validated_data)
-
-            for item_data in stock_data:
-                facturation_stock = order_models.FacturationStock.objects.create(
-                    facturation=billing, **item_data
-                )
-
-                if facturation_stock.is_delivered:
-                    stock = facturation_stock.stock
-                    stock.quantity -= facturation_stock.quantity
-                    stock.save()
-
-            for pay_data in payment_data:
-                order_models.FacturationPayment.objects.create(
-                    facturation=billing, **pay_data
-                )
+            facturation_stocks = bulk_create_facturation_lines(
+                billing, stock_data, payment_data
+            )
+            decrement_stocks(
+                billing,
+                [line for line in facturation_stocks if line.is_delivered],
+                order_models.StockMovementKind.SALE,
+            )
 
         return billing
 
@@ -305,6 +361,12 @@ class FacturationSerializer(serializers.ModelSerializer):
                     ]
                 )
 
+            if stock_data or payment_data:
+                order_models.Facturation.update_totals(
+                    order_models.Facturation.objects.filter(pk=instance.pk),
+                    instance.organization_id,
+                )
+
         return instance
 
 
@@ -356,7 +418,6 @@ class FacturationSerializer2(serializers.ModelSerializer):
     def create(self, validated_data):
         stock_data = validated_data.pop("facturation_stocks", [])
         payment_data = validated_data.pop("facturation_payments", [])
-        print(validated_data, "\n")
 
         with transaction.atomic():
             billing, created = order_models.Facturation.objects.get_or_create(
@@ -366,22 +427,9 @@ class FacturationSerializer2(serializers.ModelSerializer):
             if not created:
                 return billing
 
-            for item_data in stock_data:
-                order_models.FacturationStock.objects.create(
-                    facturation=billing, **item_data
-                )
-
-                print(item_data, "\n")
-
-                # if facturation_stock.is_delivered:
-                #     stock = facturation_stock.stock
-                #     stock.quantity -= facturation_stock.quantity
-                #     stock.save()
-
-            for pay_data in payment_data:
-                order_models.FacturationPayment.objects.create(
-                    facturation=billing, **pay_data
-                )
+            # Stock quantities are pushed separately by the app through
+            # edit-quantity/, so the lines are recorded without decrementing.
+            bulk_create_facturation_lines(billing, stock_data, payment_data)
 
         return billing
 
@@ -416,6 +464,12 @@ class FacturationSerializer2(serializers.ModelSerializer):
                     ]
                 )
 
+            if stock_data or payment_data:
+                order_models.Facturation.update_totals(
+                    order_models.Facturation.objects.filter(pk=instance.pk),
+                    instance.organization_id,
+                )
+
         return instance
 
 
@@ -423,11 +477,11 @@ class FacturationDeliverSerializer(FacturationSerializer):
     def update(self, instance, validated_data):
         with transaction.atomic():
             instance = super().update(instance, validated_data)
-
-            for facturation_stock in instance.facturation_stocks.all():
-                stock = facturation_stock.stock
-                stock.quantity = stock.quantity - facturation_stock.quantity
-                stock.save()
+            decrement_stocks(
+                instance,
+                instance.facturation_stocks.all(),
+                order_models.StockMovementKind.DELIVERY,
+            )
 
         return instance
 
@@ -520,3 +574,25 @@ class BulkCreditPaymentSerializer(serializers.ModelSerializer):
             "organization_user_name",
             "customer_name",
         ]
+
+
+class SyncDeletionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = order_models.SyncDeletion
+        fields = [
+            "id",
+            "created",
+            "model_name",
+            "object_id",
+        ]
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(
+        choices=["sale", "transaction", "bulk_credit_payment"]
+    )
+    data = serializers.DictField()
+
+
+class BatchPushSerializer(serializers.Serializer):
+    operations = BatchOperationSerializer(many=True, max_length=1000)
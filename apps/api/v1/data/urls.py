@@ -103,6 +103,16 @@ urlpatterns = [
         name="update-stock-quantity",
     ),
     path("users/", views.OrganizationUserList.as_view()),
+    path(
+        "batch/",
+        views.BatchPushView.as_view(),
+        name="batch-push",
+    ),
+    path(
+        "deletions-since/",
+        views.SyncDeletionListView.as_view(),
+        name="deletions-since",
+    ),
     # Bulk Credit Payment URLs (matching your transaction pattern)
     path(
         "bulk-credit-payments/",
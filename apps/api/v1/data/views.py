@@ -1,24 +1,25 @@
+import hashlib
 import logging
+import time
 from datetime import datetime
-from decimal import Decimal
+from itertools import islice
 
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
 from django.db.models import (
-    DecimalField,
-    ExpressionWrapper,
-    F,
-    OuterRef,
+    Count,
+    Max,
     Prefetch,  # Add this import
-    Subquery,
-    Sum,
 )
-from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from rest_framework import generics, permissions, status
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework import exceptions, generics, permissions, status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.api.v1.data import serializers
+from apps.api.v1.data import pagination, reconciliation, rows, serializers
 from apps.orders import models as order_models
 from apps.organization import mixins as org_mixins
 from apps.organization import models as org_models
@@ -26,6 +27,183 @@ from apps.organization import models as org_models
 logger = logging.getLogger(__name__)
 
 
+class DeltaSyncMixin:
+    """
+    Base of the ``*-changes/`` endpoints.
+
+    ``?cursor=`` requests are served from the per-organization change
+    sequence. Older app versions send ``?since=<timestamp>`` (seconds or
+    milliseconds) and get the rows modified after it, or every row without
+    it. The number of rows sent is returned in the ``X-Sync-Change-Count``
+    header (streamed responses only log it) and every call is logged with
+    structured ``sync_*`` fields.
+    """
+
+    pagination_class = pagination.SyncCursorPagination
+    change_count_header = "X-Sync-Change-Count"
+    sync_name = None
+
+    def is_cursor_request(self):
+        return self.paginator.is_cursor_request(self.request)
+
+    def get_since(self):
+        if not hasattr(self, "_since"):
+            self._since = None
+            value = self.request.GET.get("since")
+            if value:
+                try:
+                    since = int(value)
+                    # The Android app sends milliseconds
+                    if since > 1000000000:
+                        since = since / 1000.0
+                    self._since = datetime.fromtimestamp(since, tz=timezone.utc)
+                except (ValueError, TypeError, OverflowError, OSError) as e:
+                    logger.warning(f"Invalid timestamp '{value}': {e}")
+        return self._since
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.is_cursor_request() and self.get_since() is not None:
+            queryset = queryset.filter(modified__gt=self.get_since())
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        started = time.monotonic()
+        response = super().list(request, *args, **kwargs)
+
+        if isinstance(response, StreamingHttpResponse):
+            response.streaming_content = self.log_after_stream(
+                response.streaming_content, started
+            )
+            return response
+
+        results = getattr(response, "data", None) or []
+        if isinstance(results, dict):
+            results = results.get("results", [])
+        response[self.change_count_header] = len(results)
+        self.log_changes(len(results), started)
+        return response
+
+    def log_after_stream(self, content, started):
+        yield from content
+        self.log_changes(self.stream_row_count, started)
+
+    def log_changes(self, count, started):
+        since = self.get_since()
+        logger.info(
+            f"Served {count} {self.sync_name} changes",
+            extra={
+                "sync_endpoint": self.sync_name,
+                "sync_organization": self.request.organization.slug,
+                "sync_mode": "cursor" if self.is_cursor_request() else "since",
+                "sync_since": since.isoformat() if since else None,
+                "sync_changes": count,
+                "sync_duration_ms": round((time.monotonic() - started) * 1000, 1),
+            },
+        )
+
+
+class ConditionalListMixin:
+    """
+    Answer repeated polls of the sync lists with 304 Not Modified.
+
+    The validators come from one aggregate over the listed rows. The ETag
+    hashes the highest change sequence and the row count (which catches rows
+    leaving the list), scoped to the organization user and the response
+    format, and the latest ``modified`` of the rows and of the related rows
+    in ``validator_fields`` that the payload also shows. When the client's
+    copy is current nothing is serialized.
+
+    No Last-Modified is sent: deleting a row or editing one within the
+    second of the latest change leaves the latest ``modified`` unchanged, so
+    If-Modified-Since alone would answer 304 to a stale copy.
+    """
+
+    validator_fields = ()
+
+    def get_etag(self, queryset):
+        fields = ("modified", *self.validator_fields)
+        values = queryset.order_by().aggregate(
+            sync_seq=Max("sync_seq"),
+            count=Count("pk"),
+            **{f"max_{field}": Max(field) for field in fields},
+        )
+        modified = [values[f"max_{field}"] for field in fields]
+        organization_user = getattr(self.request, "organization_user", None)
+        scope = [
+            self.request.organization.pk,
+            getattr(organization_user, "pk", None),
+            self.request.accepted_renderer.format,
+            values["sync_seq"],
+            values["count"],
+            *modified,
+        ]
+        etag = hashlib.md5(repr(scope).encode()).hexdigest()
+        return f'"{etag}"'
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_etag(self.filter_queryset(self.get_queryset()))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class StreamingListMixin:
+    """
+    Stream unpaginated JSON lists instead of building them in memory.
+
+    The queryset is read with ``iterator(chunk_size=...)`` (prefetches are
+    done per chunk) and every chunk is serialized and written out before
+    the next one is fetched, so worker memory does not grow with the size
+    of the organization. Paginated and non-JSON responses are rendered as
+    usual.
+
+    Views can set ``values_serializer`` to build the streamed rows from
+    ``values()`` instead of going through the DRF fields of every instance.
+    """
+
+    stream_chunk_size = 500
+    values_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        if request.accepted_renderer.format != "json":
+            return super().list(request, *args, **kwargs)
+
+        return StreamingHttpResponse(
+            self.stream_json(queryset),
+            content_type=request.accepted_renderer.media_type,
+        )
+
+    def iter_serialized_chunks(self, queryset):
+        if self.values_serializer is not None:
+            yield from self.values_serializer.iter_chunks(
+                queryset, self.stream_chunk_size
+            )
+            return
+        rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+        while chunk := list(islice(rows, self.stream_chunk_size)):
+            yield self.get_serializer(chunk, many=True).data
+
+    def stream_json(self, queryset):
+        renderer = JSONRenderer()
+        separator = b"["
+        self.stream_row_count = 0
+        for data in self.iter_serialized_chunks(queryset):
+            self.stream_row_count += len(data)
+            yield separator + renderer.render(data)[1:-1]
+            separator = b","
+        yield b"[]" if separator == b"[" else b"]"
+
+
 class OrganizationUserList(org_mixins.OrganizationAPIUserMixin, generics.ListAPIView):
     """
     API endpoint that allows groups to be viewed or edited.
@@ -49,12 +227,62 @@ class OrganizationUserList(org_mixins.OrganizationAPIUserMixin, generics.ListAPI
     # permission_classes = [permissions.IsAuthenticated] add authentication in future to authenticate the organization (virtual user)
 
 
-class StockListAPIView(org_mixins.OrganizationAPIUserMixin, generics.ListAPIView):
+class IdListView(org_mixins.OrganizationAPIUserMixin, generics.ListAPIView):
+    """
+    Returns the ids of the rows the client should hold. With ``?prefix=`` the
+    ids are summarized as range hashes instead, so a device that lost its
+    sync cursor can verify its data by drilling down into differing buckets.
+    """
+
+    pagination_class = None
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        if "prefix" in request.query_params:
+            prefix = reconciliation.parse_prefix(request.query_params["prefix"])
+            return Response(reconciliation.id_range_digest(queryset, prefix))
+        return Response(list(queryset.values_list("id", flat=True)))
+
+
+class SyncDeletionListView(org_mixins.OrganizationAPIUserMixin, generics.ListAPIView):
+    """
+    GET /en/<org_slug>/api/v1/data/deletions-since/?cursor=<cursor>
+    Returns rows deleted since the cursor, optionally filtered with
+    ``?model=facturation`` (stock, customer, transaction, bulkcreditpayment).
+    """
+
+    serializer_class = serializers.SyncDeletionSerializer
+    pagination_class = pagination.SyncDeletionPagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = order_models.SyncDeletion.objects.filter(
+            organization=self.request.organization
+        )
+        model_name = self.request.GET.get("model")
+        if model_name:
+            queryset = queryset.filter(model_name=model_name)
+        return queryset
+
+
+class StockListAPIView(
+    ConditionalListMixin,
+    StreamingListMixin,
+    org_mixins.OrganizationAPIUserMixin,
+    generics.ListAPIView,
+):
     """
     API endpoint that returns all batches for the current organization.
     """
 
     serializer_class = serializers.StockSerializer
+    values_serializer = rows.ValuesSerializer(serializers.StockSerializer)
+    validator_fields = (
+        "batch__modified",
+        "batch__item__modified",
+        "batch__item__category__modified",
+    )
     pagination_class = None
     permission_classes = [permissions.IsAuthenticated]  # Enable later
 
@@ -77,68 +305,20 @@ class StockListAPIView(org_mixins.OrganizationAPIUserMixin, generics.ListAPIView
         )
 
 
-class StockIdListsView(org_mixins.OrganizationAPIUserMixin, generics.ListAPIView):
+class StockIdListsView(IdListView):
     serializer_class = serializers.StockIdSerializer
-    pagination_class = None
-    permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         return order_models.Stock.objects.filter(organization=self.request.organization)
 
-    def list(self, request, *args, **kwargs):
-        qs = self.get_queryset().values_list("id", flat=True)
-        return Response(list(qs))
-
 
-class StockChangesView(StockListAPIView):
+class StockChangesView(DeltaSyncMixin, StockListAPIView):
     """
-    API endpoint to get facturations changed since a specific timestamp
+    GET /en/<org_slug>/api/v1/data/stock-changes/?cursor=<cursor>
+    Returns the stocks changed since the cursor (or ``?since=<timestamp>``).
     """
 
-    def get_queryset(self):
-        since_timestamp = self.request.GET.get("since")
-
-        if not since_timestamp:
-            logger.warning("No 'since' parameter provided, returning all facturations")
-            return super().get_queryset()
-
-        try:
-            # Convert milliseconds timestamp to datetime
-            since_timestamp = int(since_timestamp)
-
-            # Handle milliseconds (Android sends milliseconds)
-            if since_timestamp > 1000000000:  # It's in milliseconds
-                since_timestamp_seconds = since_timestamp / 1000.0
-            else:  # It's in seconds
-                since_timestamp_seconds = since_timestamp
-
-            # Create timezone-aware datetime
-            since_date = datetime.fromtimestamp(
-                since_timestamp_seconds, tz=timezone.utc
-            )
-
-            logger.info(
-                f"Fetching facturations changed since {since_date} (timestamp: {since_timestamp})"
-            )
-
-            # Get the base queryset from parent
-            queryset = super().get_queryset()
-
-            # Filter facturations updated after the given timestamp
-            # Assuming you have updated_at field, if not, use created_at or placed_at
-            queryset = queryset.filter(modified__gt=since_date)
-
-            changes_count = queryset.count()
-            logger.info(
-                f"Found {changes_count} facturations changed since {since_date}"
-            )
-
-            return queryset
-
-        except (ValueError, TypeError) as e:
-            logger.error(f"Invalid timestamp '{since_timestamp}': {e}")
-            # Fallback to returning all facturations
-            return super().get_queryset()
+    sync_name = "stocks"
 
 
 class UpdateStockQuantityAPIView(APIView):
@@ -157,11 +337,14 @@ class UpdateStockQuantityAPIView(APIView):
                 )
 
                 # Event-based quantity update (safe for concurrency)
-                stock.quantity = F("quantity") + delta
-                stock.save(update_fields=["quantity"])
-
-                # Resolve F() expression
-                stock.refresh_from_db(fields=["quantity"])
+                organization_user = getattr(request, "organization_user", None)
+                order_models.Stock.move(
+                    {stock.pk: delta},
+                    order_models.StockMovementKind.ADJUSTMENT,
+                    stock.organization_id,
+                    organization_user_id=getattr(organization_user, "pk", None),
+                )
+                stock.refresh_from_db()
 
         except order_models.Stock.DoesNotExist:
             return Response(
@@ -173,7 +356,12 @@ class UpdateStockQuantityAPIView(APIView):
         )
 
 
-class CustomerListAPIView(org_mixins.OrganizationAPIUserMixin, generics.ListAPIView):
+class CustomerListAPIView(
+    ConditionalListMixin,
+    StreamingListMixin,
+    org_mixins.OrganizationAPIUserMixin,
+    generics.ListAPIView,
+):
     """
     API endpoint that returns all batches for the current organization.
     """
@@ -192,70 +380,22 @@ class CustomerListAPIView(org_mixins.OrganizationAPIUserMixin, generics.ListAPIV
         )
 
 
-class CustomerIdListsView(org_mixins.OrganizationAPIUserMixin, generics.ListAPIView):
+class CustomerIdListsView(IdListView):
     serializer_class = serializers.CustomerIdSerializer
-    pagination_class = None
-    permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         return order_models.Customer.objects.filter(
             organization=self.request.organization
         )
 
-    def list(self, request, *args, **kwargs):
-        qs = self.get_queryset().values_list("id", flat=True)
-        return Response(list(qs))
-
 
-class CustomerChangesView(CustomerListAPIView):
+class CustomerChangesView(DeltaSyncMixin, CustomerListAPIView):
     """
-    API endpoint to get facturations changed since a specific timestamp
+    GET /en/<org_slug>/api/v1/data/customer-changes/?cursor=<cursor>
+    Returns the customers changed since the cursor (or ``?since=<timestamp>``).
     """
 
-    def get_queryset(self):
-        since_timestamp = self.request.GET.get("since")
-
-        if not since_timestamp:
-            logger.warning("No 'since' parameter provided, returning all facturations")
-            return super().get_queryset()
-
-        try:
-            # Convert milliseconds timestamp to datetime
-            since_timestamp = int(since_timestamp)
-
-            # Handle milliseconds (Android sends milliseconds)
-            if since_timestamp > 1000000000:  # It's in milliseconds
-                since_timestamp_seconds = since_timestamp / 1000.0
-            else:  # It's in seconds
-                since_timestamp_seconds = since_timestamp
-
-            # Create timezone-aware datetime
-            since_date = datetime.fromtimestamp(
-                since_timestamp_seconds, tz=timezone.utc
-            )
-
-            logger.info(
-                f"Fetching facturations changed since {since_date} (timestamp: {since_timestamp})"
-            )
-
-            # Get the base queryset from parent
-            queryset = super().get_queryset()
-
-            # Filter facturations updated after the given timestamp
-            # Assuming you have updated_at field, if not, use created_at or placed_at
-            queryset = queryset.filter(modified__gt=since_date)
-
-            changes_count = queryset.count()
-            logger.info(
-                f"Found {changes_count} facturations changed since {since_date}"
-            )
-
-            return queryset
-
-        except (ValueError, TypeError) as e:
-            logger.error(f"Invalid timestamp '{since_timestamp}': {e}")
-            # Fallback to returning all facturations
-            return super().get_queryset()
+    sync_name = "customers"
 
 
 class CustomerCreateView(generics.CreateAPIView):
@@ -271,7 +411,12 @@ class CustomerCreateView(generics.CreateAPIView):
         serializer.save()
 
 
-class TransactionListAPIView(org_mixins.OrganizationAPIUserMixin, generics.ListAPIView):
+class TransactionListAPIView(
+    ConditionalListMixin,
+    StreamingListMixin,
+    org_mixins.OrganizationAPIUserMixin,
+    generics.ListAPIView,
+):
     """
     API endpoint that returns all batches for the current organization.
     """
@@ -295,10 +440,8 @@ class TransactionListAPIView(org_mixins.OrganizationAPIUserMixin, generics.ListA
         )
 
 
-class TransactionIdListsView(org_mixins.OrganizationAPIUserMixin, generics.ListAPIView):
+class TransactionIdListsView(IdListView):
     serializer_class = serializers.TransactionIdSerializer
-    pagination_class = None
-    permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         return order_models.Transaction.objects.filter(
@@ -306,60 +449,14 @@ class TransactionIdListsView(org_mixins.OrganizationAPIUserMixin, generics.ListA
             organization_user=self.request.organization_user,
         )
 
-    def list(self, request, *args, **kwargs):
-        qs = self.get_queryset().values_list("id", flat=True)
-        return Response(list(qs))
-
 
-class TransactionChangesView(TransactionListAPIView):
+class TransactionChangesView(DeltaSyncMixin, TransactionListAPIView):
     """
-    API endpoint to get facturations changed since a specific timestamp
+    GET /en/<org_slug>/api/v1/data/transaction-changes/?cursor=<cursor>
+    Returns the transactions changed since the cursor (or ``?since=<timestamp>``).
     """
 
-    def get_queryset(self):
-        since_timestamp = self.request.GET.get("since")
-
-        if not since_timestamp:
-            logger.warning("No 'since' parameter provided, returning all facturations")
-            return super().get_queryset()
-
-        try:
-            # Convert milliseconds timestamp to datetime
-            since_timestamp = int(since_timestamp)
-
-            # Handle milliseconds (Android sends milliseconds)
-            if since_timestamp > 1000000000:  # It's in milliseconds
-                since_timestamp_seconds = since_timestamp / 1000.0
-            else:  # It's in seconds
-                since_timestamp_seconds = since_timestamp
-
-            # Create timezone-aware datetime
-            since_date = datetime.fromtimestamp(
-                since_timestamp_seconds, tz=timezone.utc
-            )
-
-            logger.info(
-                f"Fetching facturations changed since {since_date} (timestamp: {since_timestamp})"
-            )
-
-            # Get the base queryset from parent
-            queryset = super().get_queryset()
-
-            # Filter facturations updated after the given timestamp
-            # Assuming you have updated_at field, if not, use created_at or placed_at
-            queryset = queryset.filter(modified__gt=since_date)
-
-            changes_count = queryset.count()
-            logger.info(
-                f"Found {changes_count} facturations changed since {since_date}"
-            )
-
-            return queryset
-
-        except (ValueError, TypeError) as e:
-            logger.error(f"Invalid timestamp '{since_timestamp}': {e}")
-            # Fallback to returning all facturations
-            return super().get_queryset()
+    sync_name = "transactions"
 
 
 class TransactionCreateView(generics.CreateAPIView):
@@ -399,8 +496,15 @@ class TransactionCreateView(generics.CreateAPIView):
         return Response(output_serializer.data, status=status.HTTP_201_CREATED)
 
 
-class FacturationListView(org_mixins.OrganizationAPIUserMixin, generics.ListAPIView):
+class FacturationListView(
+    ConditionalListMixin,
+    StreamingListMixin,
+    org_mixins.OrganizationAPIUserMixin,
+    generics.ListAPIView,
+):
     serializer_class = serializers.FacturationSerializer
+    values_serializer = rows.ValuesSerializer(serializers.FacturationSerializer)
+    validator_fields = ("customer__modified",)
     pagination_class = None
     permission_classes = [permissions.IsAuthenticated]
 
@@ -452,70 +556,22 @@ class FacturationListView(org_mixins.OrganizationAPIUserMixin, generics.ListAPIV
         return queryset.order_by("-placed_at")
 
 
-class FacturationIdListsView(org_mixins.OrganizationAPIUserMixin, generics.ListAPIView):
+class FacturationIdListsView(IdListView):
     serializer_class = serializers.FacturationIdSerializer
-    pagination_class = None
-    permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         return order_models.Facturation.objects.filter(
             organization=self.request.organization
         )
 
-    def list(self, request, *args, **kwargs):
-        qs = self.get_queryset().values_list("id", flat=True)
-        return Response(list(qs))
 
-
-class FacturationChangesView(FacturationListView):
+class FacturationChangesView(DeltaSyncMixin, FacturationListView):
     """
-    API endpoint to get facturations changed since a specific timestamp
+    GET /en/<org_slug>/api/v1/data/sale-changes/?cursor=<cursor>
+    Returns the sales changed since the cursor (or ``?since=<timestamp>``).
     """
 
-    def get_queryset(self):
-        since_timestamp = self.request.GET.get("since")
-
-        if not since_timestamp:
-            logger.warning("No 'since' parameter provided, returning all facturations")
-            return super().get_queryset()
-
-        try:
-            # Convert milliseconds timestamp to datetime
-            since_timestamp = int(since_timestamp)
-
-            # Handle milliseconds (Android sends milliseconds)
-            if since_timestamp > 1000000000:  # It's in milliseconds
-                since_timestamp_seconds = since_timestamp / 1000.0
-            else:  # It's in seconds
-                since_timestamp_seconds = since_timestamp
-
-            # Create timezone-aware datetime
-            since_date = datetime.fromtimestamp(
-                since_timestamp_seconds, tz=timezone.utc
-            )
-
-            logger.info(
-                f"Fetching facturations changed since {since_date} (timestamp: {since_timestamp})"
-            )
-
-            # Get the base queryset from parent
-            queryset = super().get_queryset()
-
-            # Filter facturations updated after the given timestamp
-            # Assuming you have updated_at field, if not, use created_at or placed_at
-            queryset = queryset.filter(modified__gt=since_date)
-
-            changes_count = queryset.count()
-            logger.info(
-                f"Found {changes_count} facturations changed since {since_date}"
-            )
-
-            return queryset
-
-        except (ValueError, TypeError) as e:
-            logger.error(f"Invalid timestamp '{since_timestamp}': {e}")
-            # Fallback to returning all facturations
-            return super().get_queryset()
+    sync_name = "sales"
 
 
 class FacturationCreateView(generics.CreateAPIView):
@@ -643,7 +699,10 @@ class FacturationDeleteView(generics.DestroyAPIView):
 
 
 class BulkCreditPaymentListAPIView(
-    org_mixins.OrganizationAPIUserMixin, generics.ListAPIView
+    ConditionalListMixin,
+    StreamingListMixin,
+    org_mixins.OrganizationAPIUserMixin,
+    generics.ListAPIView,
 ):
     """
     API endpoint that returns all bulk credit payments for the current organization.
@@ -653,6 +712,7 @@ class BulkCreditPaymentListAPIView(
     serializer_class = serializers.BulkCreditPaymentSerializer
     pagination_class = None
     permission_classes = [permissions.IsAuthenticated]
+    validator_fields = ("customer__modified",)
 
     def get_queryset(self):
         return (
@@ -669,79 +729,27 @@ class BulkCreditPaymentListAPIView(
         )
 
 
-class BulkCreditPaymentIdListView(
-    org_mixins.OrganizationAPIUserMixin, generics.ListAPIView
-):
+class BulkCreditPaymentIdListView(IdListView):
     """
     GET /en/<org_slug>/api/v1/data/bulk-credit-payment-ids/
     Returns only IDs of bulk credit payments for sync.
     """
 
     serializer_class = serializers.BulkCreditPaymentIdSerializer
-    pagination_class = None
-    permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         return order_models.BulkCreditPayment.objects.filter(
             organization=self.request.organization,
         )
 
-    def list(self, request, *args, **kwargs):
-        qs = self.get_queryset().values_list("id", flat=True)
-        return Response(list(qs))
 
-
-class BulkCreditPaymentChangesView(BulkCreditPaymentListAPIView):
+class BulkCreditPaymentChangesView(DeltaSyncMixin, BulkCreditPaymentListAPIView):
     """
-    API endpoint to get bulk credit payments changed since a specific timestamp
-    GET /en/<org_slug>/api/v1/data/bulk-credit-payment-changes/
+    GET /en/<org_slug>/api/v1/data/bulk-credit-payment-changes/?cursor=<cursor>
+    Returns the bulk credit payments changed since the cursor (or ``?since=<timestamp>``).
     """
 
-    def get_queryset(self):
-        since_timestamp = self.request.GET.get("since")
-
-        if not since_timestamp:
-            logger.warning(
-                "No 'since' parameter provided, returning all bulk credit payments"
-            )
-            return super().get_queryset()
-
-        try:
-            # Convert milliseconds timestamp to datetime
-            since_timestamp = int(since_timestamp)
-
-            # Handle milliseconds (Android sends milliseconds)
-            if since_timestamp > 1000000000:  # It's in milliseconds
-                since_timestamp_seconds = since_timestamp / 1000.0
-            else:  # It's in seconds
-                since_timestamp_seconds = since_timestamp
-
-            # Create timezone-aware datetime
-            since_date = datetime.fromtimestamp(
-                since_timestamp_seconds, tz=timezone.utc
-            )
-
-            logger.info(
-                f"Fetching bulk credit payments changed since {since_date} (timestamp: {since_timestamp})"
-            )
-
-            # Get the base queryset from parent
-            queryset = super().get_queryset()
-
-            # Filter payments updated after the given timestamp
-            queryset = queryset.filter(modified__gt=since_date)
-
-            changes_count = queryset.count()
-            logger.info(
-                f"Found {changes_count} bulk credit payments changed since {since_date}"
-            )
-
-            return queryset
-
-        except (ValueError, TypeError) as e:
-            logger.error(f"Invalid timestamp '{since_timestamp}': {e}")
-            # Fallback to returning all payments
-            return super().get_queryset()
+    sync_name = "bulk_credit_payments"
 
 
 class BulkCreditPaymentCreateView(generics.CreateAPIView):
@@ -776,51 +784,7 @@ class BulkCreditPaymentCreateView(generics.CreateAPIView):
         )
 
         customer = obj.customer
-
-        # Get unpaid facturations
-        unpaid_facturations = self._get_unpaid_facturations(customer)
-
-        # if not unpaid_facturations:
-        #     messages.warning(
-        #         self.request,
-        #         f"Le client {customer.name} n'a aucune facture impayée.",
-        #     )
-        #     # You might want to redirect or handle this case
-        #     return self.form_invalid(form)
-
-        # Calculate total outstanding
-        # total_outstanding = sum(
-        #     facturation.remaining_balance for facturation in unpaid_facturations
-        # )
-
-        # Allocate payments
-        remaining_amount = obj.amount
-        allocations = {}
-        payments_to_create = []
-
-        for facturation in unpaid_facturations:
-            if remaining_amount <= 0:
-                break
-
-            allocate_amount = min(remaining_amount, facturation.remaining_balance)
-
-            if allocate_amount > 0:
-                payments_to_create.append(
-                    order_models.FacturationPayment(
-                        facturation=facturation,
-                        organization=facturation.organization,
-                        bulk_credit_payment=obj,
-                        organization_user=obj.organization_user,
-                        transaction_broker=obj.transaction_broker,
-                        amount=allocate_amount,
-                    )
-                )
-                allocations[facturation.id] = allocate_amount
-                remaining_amount -= allocate_amount
-
-        # Bulk create payments
-        if payments_to_create:
-            order_models.FacturationPayment.objects.bulk_create(payments_to_create)
+        obj.allocate()
 
         # Create transaction
         order_models.Transaction.objects.create(
@@ -833,88 +797,8 @@ class BulkCreditPaymentCreateView(generics.CreateAPIView):
             reason=f"Recouvrement de {str(customer)}",
         )
 
-        # Handle results
-        total_allocated = sum(allocations.values())
-        leftover = obj.amount - total_allocated
-
-        if leftover > 0:
-            customer.prepaid_amount = customer.prepaid_amount + leftover
-            customer.save()
-            # print(f"Montant restant: {leftover}. Créé comme crédit client.")
-
-        # Store for success page
-        # self.request.session["last_bulk_payment_id"] = bulk_credit_payment.id
-
         return obj
 
-    def _get_unpaid_facturations(self, customer):
-        """
-        Get unpaid facturations using subqueries to calculate:
-        - total_paid: Sum of all payments for the facturation
-        - total_sales: Sum of (unit_price * quantity) for all facturation_stocks
-        """
-
-        # Subquery to calculate total paid for each facturation
-        total_paid_subquery = (
-            order_models.FacturationPayment.objects.filter(
-                facturation_id=OuterRef("pk")
-            )
-            .values("facturation_id")
-            .annotate(
-                total=Sum(
-                    "amount", output_field=DecimalField(max_digits=19, decimal_places=4)
-                )
-            )
-            .values("total")[:1]
-        )
-
-        # Subquery to calculate total sales (unit_price * quantity) for each facturation
-        total_sales_subquery = (
-            order_models.FacturationStock.objects.filter(facturation_id=OuterRef("pk"))
-            .values("facturation_id")
-            .annotate(
-                total=Sum(
-                    F("unit_price") * F("quantity"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                )
-            )
-            .values("total")[:1]
-        )
-
-        # Get facturations with annotations
-        unpaid_facturations = (
-            order_models.Facturation.objects.filter(
-                organization=self.request.organization,
-                customer=customer,
-                is_proforma=False,
-            )
-            .annotate(
-                # Annotate with total paid using Coalesce to handle None values
-                total_paid=Coalesce(
-                    Subquery(total_paid_subquery),
-                    Decimal("0"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
-                # Annotate with total sales using Coalesce to handle None values
-                total_sales=Coalesce(
-                    Subquery(total_sales_subquery),
-                    Decimal("0"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
-                # Calculate remaining balance
-                remaining_balance=ExpressionWrapper(
-                    F("total_sales") - F("total_paid"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
-            )
-            .filter(
-                remaining_balance__gt=0  # Only get facturations with positive balance
-            )
-            .order_by("placed_at")
-        )  # Oldest first (FIFO)
-
-        return unpaid_facturations
-
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -975,3 +859,67 @@ class BulkCreditPaymentDeleteView(generics.DestroyAPIView):
         self.perform_destroy(instance)
 
         return Response(serialized_data, status=status.HTTP_200_OK)
+
+
+class BatchPushView(org_mixins.OrganizationAPIUserMixin, APIView):
+    """
+    POST /en/<org_slug>/api/v1/data/batch/
+    Replays operations queued offline by a terminal in a single request:
+    {"operations": [{"type": "sale", "data": {...}}, ...]}
+
+    Operations are applied in order, one database transaction per chunk, with
+    a savepoint per operation so a failing item, whatever the error, is
+    reported without discarding the others. Each item goes through the same
+    serializer and ``perform_create`` as its single-object endpoint, so client
+    ids keep replays idempotent. The handlers' ``create()`` is not called: it
+    only builds the single-object response, and anything added there would
+    not apply to batched items.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    chunk_size = 100
+    handlers = {
+        "sale": FacturationCreateView2,
+        "transaction": TransactionCreateView,
+        "bulk_credit_payment": BulkCreditPaymentCreateView,
+    }
+
+    def post(self, request, *args, **kwargs):
+        envelope = serializers.BatchPushSerializer(data=request.data)
+        envelope.is_valid(raise_exception=True)
+        operations = envelope.validated_data["operations"]
+
+        results = []
+        for start in range(0, len(operations), self.chunk_size):
+            with transaction.atomic():
+                for index, operation in enumerate(
+                    operations[start : start + self.chunk_size], start
+                ):
+                    results.append(self.apply(index, operation))
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+    def apply(self, index, operation):
+        handler = self.handlers[operation["type"]](
+            request=self.request,
+            args=self.args,
+            kwargs=self.kwargs,
+            format_kwarg=self.format_kwarg,
+        )
+        result = {"index": index, "type": operation["type"]}
+
+        try:
+            with transaction.atomic():
+                serializer = handler.get_serializer(data=operation["data"])
+                if not serializer.is_valid():
+                    return {**result, "status": "error", "errors": serializer.errors}
+                created = handler.perform_create(serializer)
+        except (exceptions.ValidationError, DjangoValidationError) as e:
+            detail = getattr(e, "detail", None) or getattr(e, "messages", str(e))
+            return {**result, "status": "error", "errors": detail}
+        except Exception as e:
+            logger.exception(f"Batch operation {index} ({operation['type']}) failed")
+            return {**result, "status": "error", "errors": str(e)}
+
+        instance = serializer.instance if serializer.instance is not None else created
+        return {**result, "status": "ok", "id": instance.pk}
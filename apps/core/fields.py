@@ -2,6 +2,7 @@ import datetime
 import random
 import string
 
+from django.apps import apps
 from django.db import models
 
 
@@ -63,20 +64,15 @@ class ProfessionalBillNumberField(models.CharField):
         kwargs.setdefault("max_length", 20)
         super().__init__(*args, **kwargs)
 
-    def _generate_bill_number(self):
-        # Generate a bill number based on the current timestamp
-        now = datetime.datetime.now(datetime.timezone.utc)
-        timestamp_string = now.strftime("%Y%m%d%H%M%S")
-        timestamp_int = int(datetime.datetime.timestamp(now))
-        # sequence_number = model_instance.__class__.objects.count() + 1
-        sequence_number = random.randint(1000, 9999)
-        # bill_number = f"{timestamp_int}Q{sequence_number}"
-        bill_number = f"{timestamp_int}"
-        return bill_number
+    def _generate_bill_number(self, model_instance):
+        # Numbers come from the per-organization sequence, so two documents
+        # of the same second no longer share one.
+        sequence = apps.get_model("orders", "BillNumberSequence")
+        return str(sequence.next_value(model_instance.organization_id))
 
     def pre_save(self, model_instance, add):
         if add:
-            bill_number = self._generate_bill_number()
+            bill_number = self._generate_bill_number(model_instance)
             setattr(model_instance, self.attname, bill_number)
         else:
             bill_number = getattr(model_instance, self.attname)
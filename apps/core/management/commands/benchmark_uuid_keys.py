@@ -0,0 +1,112 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from apps.core.models import uuid7
+
+COLUMNS = (
+    "id uuid PRIMARY KEY",
+    "organization_id uuid NOT NULL",
+    "facturation_id uuid NOT NULL",
+    "stock_id uuid NOT NULL",
+    "quantity integer NOT NULL",
+    "unit_price numeric(19, 4) NOT NULL",
+    "created timestamp with time zone NOT NULL",
+    "modified timestamp with time zone NOT NULL",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the insert throughput and primary key index size of random "
+        "(uuid4) and time-ordered (uuid7) keys on scratch tables shaped like "
+        "facturation lines. Nothing is kept: the tables are temporary."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=500_000, help="Rows inserted per key kind"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows per INSERT, as a bulk_create would send them",
+        )
+        parser.add_argument(
+            "--organizations",
+            type=int,
+            default=50,
+            help="Number of organizations the lines are spread over",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor != "postgresql":
+            raise CommandError("The benchmark measures PostgreSQL index sizes.")
+
+        results = {}
+        for name, generate in (("uuid4", uuid.uuid4), ("uuid7", uuid7)):
+            results[name] = self.run(connection, name, generate, options)
+            rate, index_size, table_size = results[name]
+            self.stdout.write(
+                f"{name}: {rate:,.0f} rows/s, primary key index "
+                f"{index_size / 2**20:,.1f} MiB, table {table_size / 2**20:,.1f} MiB"
+            )
+
+        (rate4, index4, _), (rate7, index7, _) = results["uuid4"], results["uuid7"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"uuid7 inserts {rate7 / rate4:.2f}x as fast with an index "
+                f"{index7 / index4:.2f}x the size of uuid4."
+            )
+        )
+
+    def run(self, connection, name, generate, options):
+        table = f"benchmark_{name}"
+        rows, batch_size = options["rows"], options["batch_size"]
+        organizations = [uuid.uuid4() for _ in range(options["organizations"])]
+        stocks = [uuid.uuid4() for _ in range(200)]
+        placeholders = ", ".join(["%s"] * len(COLUMNS))
+
+        elapsed = 0.0
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {table} ({', '.join(COLUMNS)}) ON COMMIT DROP"
+            )
+            moment = timezone.now() - timedelta(days=365)
+            for offset in range(0, rows, batch_size):
+                count = min(batch_size, rows - offset)
+                facturation_id = uuid.uuid4()
+                params = []
+                for _ in range(count):
+                    moment += timedelta(seconds=30)
+                    params += [
+                        generate(),
+                        random.choice(organizations),
+                        facturation_id,
+                        random.choice(stocks),
+                        random.randint(1, 20),
+                        Decimal(random.randint(100, 50_000)),
+                        moment,
+                        moment,
+                    ]
+                sql = f"INSERT INTO {table} VALUES " + ", ".join(
+                    [f"({placeholders})"] * count
+                )
+                start = time.perf_counter()
+                cursor.execute(sql, params)
+                elapsed += time.perf_counter() - start
+
+            cursor.execute(
+                "SELECT pg_relation_size(%s), pg_relation_size(%s)",
+                [f"{table}_pkey", table],
+            )
+            index_size, table_size = cursor.fetchone()
+        return rows / elapsed, index_size, table_size
@@ -0,0 +1,101 @@
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.template import base
+from django.template.backends import django as backend
+from django.test import Client
+
+# Queries run before any template starts rendering.
+VIEW = "(view)"
+
+
+class QueryRecorder:
+    """
+    Count the queries run while each template renders, attributed to the
+    innermost template. Context processors run as a template response starts
+    rendering, so their queries count against its (partial) template.
+    """
+
+    def __init__(self):
+        self.templates = []
+        self.counts = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.counts[self.templates[-1] if self.templates else VIEW] += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def rendering(self, template_class, name_of):
+        render = template_class.render
+        recorder = self
+
+        def instrumented_render(template, *args, **kwargs):
+            recorder.templates.append(name_of(template) or "<string>")
+            try:
+                return render(template, *args, **kwargs)
+            finally:
+                recorder.templates.pop()
+
+        template_class.render = instrumented_render
+        try:
+            yield
+        finally:
+            template_class.render = render
+
+    @contextmanager
+    def recording(self):
+        with ExitStack() as stack:
+            stack.enter_context(
+                self.rendering(
+                    backend.Template,
+                    lambda template: getattr(template.template, "name", None),
+                )
+            )
+            stack.enter_context(
+                self.rendering(base.Template, lambda template: template.name)
+            )
+            stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+class Command(BaseCommand):
+    help = (
+        "Request pages as a user and report how many queries the view and "
+        "each template or partial rendered for them run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Paths to request")
+        parser.add_argument(
+            "--user", required=True, help="Email of the user to log in as"
+        )
+        parser.add_argument(
+            "--htmx",
+            action="store_true",
+            help="Send the requests as HTMX does, so views answer with partials",
+        )
+        parser.add_argument(
+            "--host", default="localhost", help="Host the requests are sent to"
+        )
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(email=options["user"]).first()
+        if user is None:
+            raise CommandError(f"There is no user with email {options['user']}.")
+
+        client = Client(HTTP_HOST=options["host"])
+        client.force_login(user)
+        headers = {"HX-Request": "true"} if options["htmx"] else {}
+
+        for path in options["paths"]:
+            recorder = QueryRecorder()
+            with recorder.recording():
+                response = client.get(path, headers=headers)
+            self.stdout.write(
+                f"{path}: {response.status_code}, {recorder.counts.total()} queries"
+            )
+            for template_name, count in recorder.counts.most_common():
+                self.stdout.write(f"  {count:>5}  {template_name}")
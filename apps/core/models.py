@@ -1,3 +1,5 @@
+import os
+import time
 import uuid
 
 from django.db import models
@@ -9,6 +11,19 @@ class SimpleBaseModel(TimeStampedModel):
         abstract = True
 
 
+def uuid7():
+    """
+    A time-ordered UUID (RFC 9562 version 7): 48 bits of Unix milliseconds
+    then random bits. Keys created together share index pages instead of
+    landing on random ones.
+    """
+    timestamp = time.time_ns() // 1_000_000
+    value = (timestamp << 80) | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # variant
+    return uuid.UUID(int=value)
+
+
 class BaseModel(SimpleBaseModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
@@ -16,6 +31,19 @@ class BaseModel(SimpleBaseModel):
         abstract = True
 
 
+class TimeOrderedModel(BaseModel):
+    """
+    ``BaseModel`` keyed by ``uuid7()``, for append-heavy tables. List it
+    before the other model bases so that its ``id`` wins. Keys sent by
+    clients are stored as they are, whatever their UUID version.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+
+    class Meta:
+        abstract = True
+
+
 class FAQ(models.Model):
     question = models.CharField(max_length=255)
     response = models.TextField(max_length=555)
@@ -0,0 +1,121 @@
+"""
+Fixtures shared by the test suites: an organization with an active seller,
+and the catalog rows a sale needs.
+"""
+
+import datetime
+import itertools
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.orders import models as order_models
+from apps.organization import resolvers
+from apps.organization.models import Organization, OrganizationUser
+
+_numbers = itertools.count(1)
+
+
+def create_organization(parent=None, **kwargs):
+    number = next(_numbers)
+    kwargs.setdefault("name", f"Pharmacie {number}")
+    kwargs.setdefault("hierarchy_level", Organization.HierachyLevelChoices.Center)
+    return Organization.objects.create(
+        slug=f"pharmacie-{number}",
+        contact_email=f"contact-{number}@pharmacie.test",
+        credential=f"PH-{number}",
+        parent=parent,
+        **kwargs,
+    )
+
+
+def create_organization_user(organization, **kwargs):
+    number = next(_numbers)
+    user = get_user_model().objects.create_user(
+        email=f"seller-{number}@pharmacie.test",
+        username=f"seller-{number}",
+        password="secret",
+    )
+    return OrganizationUser.objects.create(
+        organization=organization, user=user, is_active=True, **kwargs
+    )
+
+
+def create_stock(organization_user, quantity=100, price=Decimal("7.5")):
+    """A stock of a new batch of the organization's item."""
+    organization = organization_user.organization
+    category, _ = order_models.Category.objects.get_or_create(
+        organization=organization, name="Antalgiques"
+    )
+    item, _ = order_models.Item.objects.get_or_create(
+        organization=organization, name="Paracetamol", category=category
+    )
+    supplier, _ = order_models.Supplier.objects.get_or_create(
+        organization=organization, name="Grossiste"
+    )
+    batch = order_models.Batch.objects.create(
+        organization=organization,
+        item=item,
+        supplier=supplier,
+        batch_number=f"B{next(_numbers)}",
+        received_date=datetime.date(2026, 1, 5),
+        expiration_date=datetime.date(2027, 1, 5),
+        purchase_price=Decimal(5),
+        facturation_price=price,
+        quantity=quantity,
+        last_maintainer=organization_user,
+    )
+    return order_models.Stock.objects.create(
+        organization=organization,
+        organization_user=organization_user,
+        batch=batch,
+        quantity=quantity,
+    )
+
+
+def create_sale(organization_user, customer, lines=(), paid=None):
+    """A facturation of ``customer`` with ``(stock, quantity)`` lines."""
+    organization = organization_user.organization
+    facturation = order_models.Facturation.objects.create(
+        organization=organization,
+        organization_user=organization_user,
+        customer=customer,
+    )
+    for stock, quantity in lines:
+        order_models.FacturationStock.objects.create(
+            organization=organization,
+            organization_user=organization_user,
+            facturation=facturation,
+            stock=stock,
+            quantity=quantity,
+            unit_price=stock.batch.facturation_price,
+        )
+    if paid is not None:
+        order_models.FacturationPayment.objects.create(
+            organization=organization,
+            organization_user=organization_user,
+            facturation=facturation,
+            amount=paid,
+        )
+    facturation.refresh_from_db()
+    return facturation
+
+
+class OrganizationTestCase(TestCase):
+    """Tests run in an organization with an active seller and a customer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = create_organization()
+        cls.organization_user = create_organization_user(cls.organization)
+        cls.user = cls.organization_user.user
+        cls.customer = order_models.Customer.objects.create(
+            organization=cls.organization, name="Client"
+        )
+
+    def setUp(self):
+        # A shared cache outlives the rollback of each test's transaction.
+        cache.clear()
+        resolvers.local_cache.clear()
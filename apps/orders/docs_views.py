@@ -201,17 +201,7 @@ class OrgFacturationListExportView(
                     "facturation_list_user",
                 )
             elif export_format == "pdf":
-                # 1. Aggregate Payments - Fixed version
-                total_paid_sq = (
-                    order_models.FacturationPayment.objects.filter(
-                        facturation_id=OuterRef("id")
-                    )
-                    .values("facturation_id")  # Group by facturation_id
-                    .annotate(total_paid=Sum("amount"))
-                    .values("total_paid")
-                )
-
-                # 2. Aggregate Batches/Items - Fixed version
+                # Aggregate Batches/Items - Fixed version
                 total_quantity_sq = (
                     order_models.FacturationStock.objects.filter(
                         facturation_id=OuterRef("id")
@@ -221,88 +211,49 @@ class OrgFacturationListExportView(
                     .values("total_items")
                 )
 
-                total_amount_sq = (
-                    order_models.FacturationStock.objects.filter(
-                        facturation_id=OuterRef("id")
-                    )
-                    .values("facturation_id")  # Group by facturation_id
-                    .annotate(total_amount=Sum(F("quantity") * F("unit_price")))
-                    .values("total_amount")
-                )
-
-                # Calculate facturations with annotations (for individual records)
+                # Amounts come from the materialized facturation totals
                 facturations = filtered_queryset.annotate(
-                    total_amount=Coalesce(
-                        Subquery(
-                            total_amount_sq,
-                            output_field=DecimalField(max_digits=19, decimal_places=6),
-                        ),
-                        Value(
-                            0,
-                            output_field=DecimalField(max_digits=19, decimal_places=6),
-                        ),
-                    ),
+                    total_amount=F("total_sales"),
                     total_items=Coalesce(
                         Subquery(total_quantity_sq, output_field=IntegerField()),
                         Value(0, output_field=IntegerField()),
                     ),
-                    total_paid=Coalesce(
-                        Subquery(
-                            total_paid_sq,
-                            output_field=DecimalField(max_digits=19, decimal_places=6),
-                        ),
-                        Value(
-                            0,
-                            output_field=DecimalField(max_digits=19, decimal_places=6),
-                        ),
-                    ),
-                ).annotate(
-                    total_due=ExpressionWrapper(
-                        F("total_amount") - F("total_paid"),
-                        output_field=DecimalField(max_digits=19, decimal_places=6),
-                    )
+                    total_due=F("balance"),
                 )
 
-                # BEST APPROACH: Calculate totals directly from related models with proper output_field
                 batch_totals = order_models.FacturationStock.objects.filter(
                     facturation_id__in=filtered_queryset.values("id")
                 ).aggregate(
-                    total_sales_amount=Coalesce(
-                        Sum(
-                            F("quantity") * F("unit_price"),
-                            output_field=DecimalField(max_digits=19, decimal_places=6),
-                        ),
-                        Value(
-                            0,
-                            output_field=DecimalField(max_digits=19, decimal_places=6),
-                        ),
-                    ),
                     total_sales_items=Coalesce(
                         Sum("quantity", output_field=IntegerField()),
                         Value(0, output_field=IntegerField()),
                     ),
                 )
 
-                payment_totals = order_models.FacturationPayment.objects.filter(
-                    facturation_id__in=filtered_queryset.values("id")
+                amount_totals = order_models.Facturation.objects.filter(
+                    id__in=filtered_queryset.values("id")
                 ).aggregate(
-                    grand_total_paid=Coalesce(
-                        Sum(
-                            "amount",
-                            output_field=DecimalField(max_digits=19, decimal_places=6),
+                    total_sales_amount=Coalesce(
+                        Sum("total_sales"),
+                        Value(
+                            0,
+                            output_field=DecimalField(max_digits=19, decimal_places=4),
                         ),
+                    ),
+                    grand_total_paid=Coalesce(
+                        Sum("total_paid"),
                         Value(
                             0,
-                            output_field=DecimalField(max_digits=19, decimal_places=6),
+                            output_field=DecimalField(max_digits=19, decimal_places=4),
                         ),
                     ),
                 )
 
                 totals = {
-                    "total_sales_amount": batch_totals["total_sales_amount"] or 0,
+                    "total_sales_amount": amount_totals["total_sales_amount"] or 0,
                     "total_sales_count": filtered_queryset.count(),
                     "total_sales_items": batch_totals["total_sales_items"] or 0,
-                    "grand_total_paid": payment_totals["grand_total_paid"] or 0,
+                    "grand_total_paid": amount_totals["grand_total_paid"] or 0,
                 }
                 totals["grand_total_due"] = (
                     totals["total_sales_amount"] - totals["grand_total_paid"]
@@ -493,16 +444,15 @@ class OrgStockListReturnToStoreView(order_views.OrgStockListView):
             with transaction.atomic():
                 # Create dictionary to track batch updates
                 batch_updates = {}
+                returned = {}
 
                 # First, collect all stocks that will be updated
                 stocks_to_update = []
+                sync_seq = order_models.SyncSequence.next_value(
+                    self.request.organization.id
+                )
 
                 for stock in selected_stocks:
-                    # Add stock to update list (set quantity to 0)
-                    stock.quantity = 0
-                    stock.is_active = False
-                    stocks_to_update.append(stock)
-
                     # Track batch quantity increases
                     batch_id = stock.batch_id
                     if batch_id not in batch_updates:
@@ -511,11 +461,18 @@ class OrgStockListReturnToStoreView(order_views.OrgStockListView):
                             "total_quantity": 0,
                         }
                     batch_updates[batch_id]["total_quantity"] += stock.quantity
+                    returned[stock.pk] = -stock.quantity
+
+                    # Add stock to update list (set quantity to 0)
+                    stock.quantity = 0
+                    stock.is_active = False
+                    stock.sync_seq = sync_seq
+                    stocks_to_update.append(stock)
 
                 # Bulk update stocks to zero
                 if stocks_to_update:
                     order_models.Stock.objects.bulk_update(
-                        stocks_to_update, ["quantity", "is_active"]
+                        stocks_to_update, ["quantity", "is_active", "sync_seq"]
                     )
 
                 # Prepare batches for bulk_update
@@ -531,6 +488,21 @@ class OrgStockListReturnToStoreView(order_views.OrgStockListView):
                         batches_to_update, ["quantity"]
                     )
 
+                # Bulk updates bypass save(), journal them and refresh the
+                # counters here.
+                order_models.StockMovement.record(
+                    returned,
+                    order_models.StockMovementKind.RETURN,
+                    self.request.organization.id,
+                    organization_user_id=self.request.organization_user.pk,
+                )
+                order_models.StockLevel.refresh(
+                    order_models.StockLevel.holders(selected_stocks)
+                )
+                order_models.Item.update_quantities(
+                    order_models.Item.objects.filter(batchs__in=batch_updates)
+                )
+
                 # Get counts for message
                 stock_count = len(stocks_to_update)
                 total_units = sum(b["total_quantity"] for b in batch_updates.values())
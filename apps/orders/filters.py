@@ -1,17 +1,12 @@
 from datetime import datetime, timedelta
 
 import django_filters
-from django.db.models import (
-    Case,
-    F,
-    Q,
-    Sum,
-    When,
-)
+from django.db.models import F, Q
 from django_filters import CharFilter, ChoiceFilter, filters
 
 from apps.core.filters import BaseFilter
 from apps.organization import models as org_models
+from apps.organization import resolvers
 
 from . import models
 
@@ -23,9 +18,8 @@ class BaseOrganizationFilter(BaseFilter):
         # )  # Must be pop before the super method
 
         super().__init__(*args, **kwargs)
-        organizations = self.request.organization.get_descendants(include_self=True)
         self.filters["organization"].queryset = org_models.Organization.objects.filter(
-            id__in=organizations
+            id__in=resolvers.get_subtree_ids(self.request.organization)
         )
 
     class Meta:
@@ -64,27 +58,12 @@ class ItemFilter(BaseFilter):
         )
 
     def filter_by_stock_status(self, queryset, name, value):
-        queryset = queryset.annotate(
-            annotated_total_quantity=Sum(
-                Case(
-                    When(
-                        batchs__expiration_date__gt=datetime.now().date(),
-                        then=F("batchs__quantity"),
-                    ),
-                    default=0,
-                )
-            )
-        )
-
         if value == "in_stock":
-            return queryset.filter(annotated_total_quantity__gt=F("alert_quantity"))
+            return queryset.filter(quantity__gt=F("alert_quantity"))
         elif value == "low_stock":
-            return queryset.filter(
-                annotated_total_quantity__gt=0,
-                annotated_total_quantity__lte=F("alert_quantity"),
-            )
+            return queryset.filter(quantity__gt=0, quantity__lte=F("alert_quantity"))
         elif value == "out_of_stock":
-            return queryset.filter(annotated_total_quantity__lte=0)
+            return queryset.filter(quantity__lte=0)
         return queryset
 
     def filter_by_name_or_category(self, queryset, name, value):
@@ -1,5 +1,8 @@
+from decimal import Decimal
+
 from dal import autocomplete
 from django import forms
+from django.db import transaction
 from django_flatpickr import widgets as flatpickr_widgets
 
 from apps.orders import models as order_models
@@ -18,6 +21,35 @@ class CustomerForm(forms.ModelForm):
         self.fields["organization"].initial = organization
         self.fields["organization"].label = ""
 
+    def save(self, commit=True):
+        """
+        Post the change of the prepaid amount to the customer ledger, as the
+        difference with the amount shown in the form, instead of writing it
+        over the credit posted since. Nothing is posted when not committing.
+        """
+        customer = super().save(commit=False)
+        shown = self.get_initial_for_field(
+            self.fields["prepaid_amount"], "prepaid_amount"
+        )
+        shown = Decimal(str(shown or 0))
+        credit = customer.prepaid_amount - shown
+        customer.prepaid_amount = shown
+        if commit:
+            with transaction.atomic():
+                customer.save()
+                order_models.CustomerLedgerEntry.post(
+                    [
+                        order_models.CustomerLedgerEntry(
+                            organization_id=customer.organization_id,
+                            customer=customer,
+                            kind=order_models.LedgerEntryKind.PREPAID,
+                            amount=credit,
+                        )
+                    ]
+                )
+            customer.refresh_from_db(fields=["prepaid_amount"])
+        return customer
+
     class Meta:
         model = order_models.Customer
         fields = [
@@ -0,0 +1,90 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+
+from apps.api.v1.data import serializers
+from apps.api.v1.data.rows import ValuesSerializer
+from apps.orders import models as order_models
+from apps.organization.models import Organization
+
+
+def serialize_drf(serializer_class, queryset):
+    return serializer_class(queryset, many=True).data
+
+
+def serialize_values(serializer_class, queryset):
+    return [
+        row
+        for chunk in ValuesSerializer(serializer_class).iter_chunks(queryset)
+        for row in chunk
+    ]
+
+
+ENGINES = (("drf", serialize_drf), ("values", serialize_values))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of the values() sync serializers with the DRF "
+        "serializers on the data of an organization. Their payloads are "
+        "checked equal by the apps.api tests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("organization", help="Slug of the organization")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def get_cases(self, organization):
+        stocks = order_models.Stock.objects.filter(
+            organization=organization, is_active=True
+        ).select_related(
+            "organization",
+            "organization_user__user",
+            "batch__item__category",
+        )
+        facturations = (
+            order_models.Facturation.objects.filter(organization=organization)
+            .select_related("organization", "customer", "organization_user__user")
+            .prefetch_related(
+                Prefetch(
+                    "facturation_stocks",
+                    queryset=order_models.FacturationStock.objects.select_related(
+                        "organization", "stock__batch__item"
+                    ),
+                ),
+                Prefetch(
+                    "facturation_payments",
+                    queryset=order_models.FacturationPayment.objects.select_related(
+                        "organization"
+                    ),
+                ),
+            )
+        )
+        return [
+            ("stocks", serializers.StockSerializer, stocks.order_by("-created")),
+            (
+                "sales",
+                serializers.FacturationSerializer,
+                facturations.order_by("-placed_at"),
+            ),
+        ]
+
+    def handle(self, *args, **options):
+        try:
+            organization = Organization.objects.get(slug=options["organization"])
+        except Organization.DoesNotExist:
+            raise CommandError(f"Unknown organization {options['organization']!r}")
+
+        for label, serializer_class, queryset in self.get_cases(organization):
+            self.stdout.write(f"{label}:")
+            for engine, serialize in ENGINES:
+                started = time.perf_counter()
+                for _ in range(options["repeat"]):
+                    rows = len(serialize(serializer_class, queryset.all()))
+                elapsed = (time.perf_counter() - started) / options["repeat"]
+                rate = rows / elapsed if elapsed else 0
+                self.stdout.write(
+                    f"  {engine:>6}: {rows} rows in {elapsed * 1000:.1f} ms"
+                    f" ({rate:.0f} rows/s)"
+                )
@@ -0,0 +1,47 @@
+from django.db.models import F, Q
+from django.db.models.functions import Round
+
+from apps.orders.management.drift import DriftCheckCommand
+from apps.orders.models import (
+    Facturation,
+    FacturationPayment,
+    FacturationRefund,
+    FacturationStock,
+)
+
+
+class Command(DriftCheckCommand):
+    help = (
+        "Compare the materialized facturation totals with their lines and "
+        "optionally repair the ones that drifted."
+    )
+    model = Facturation
+    rows = "facturation(s)"
+    consistent_message = "All facturation totals are consistent."
+    repair_help = "Recompute the drifted totals"
+    repaired_message = "Repaired {count} facturation(s)."
+
+    def get_drift(self, queryset):
+        expected = Facturation.totals_expressions(
+            FacturationStock, FacturationPayment, FacturationRefund
+        )
+        drift = Q()
+        for name in Facturation.TOTAL_FIELDS:
+            drift |= ~Q(**{name: F(f"expected_{name}")})
+        drifted = (
+            queryset.annotate(
+                **{
+                    f"expected_{name}": Round(expression, 4)
+                    for name, expression in expected.items()
+                }
+            )
+            .filter(drift)
+            .values_list("organization_id", "pk", "bill_number")
+        )
+        for organization_id, pk, bill_number in drifted.iterator():
+            yield organization_id, pk, None, f"Drifted totals: {bill_number} ({pk})"
+
+    def repair(self, organization_id, drift):
+        Facturation.update_totals(
+            Facturation.objects.filter(pk__in=drift), organization_id
+        )
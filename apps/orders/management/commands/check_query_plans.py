@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.orders.models import Customer
+from apps.orders.query_plans import explain, get_checks
+from apps.organization.models import OrganizationUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Explain the hot queries of the main views and data API endpoints, as "
+        "the views build them, and check that each one is planned with the "
+        "index designed for it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--organization",
+            help="Explain the queries of the organization with this slug",
+        )
+        parser.add_argument(
+            "--verbose-plans", action="store_true", help="Print every plan"
+        )
+
+    def handle(self, *args, **options):
+        # The views need a member and a customer of the organization.
+        customers = Customer.objects.all()
+        if options["organization"]:
+            customers = customers.filter(organization__slug=options["organization"])
+        customer = customers.filter(
+            organization__organization_users__isnull=False
+        ).first()
+        if customer is None:
+            raise CommandError("No organization with a member and a customer.")
+        organization_user = OrganizationUser.objects.filter(
+            organization_id=customer.organization_id
+        ).first()
+
+        failures = []
+        for name, queryset, index in get_checks(organization_user, customer):
+            plan = explain(queryset)
+            if options["verbose_plans"]:
+                self.stdout.write(f"{name}:\n{plan}\n")
+            if index in plan:
+                self.stdout.write(f"{name}: uses {index}")
+            else:
+                failures.append(name)
+                self.stdout.write(
+                    self.style.ERROR(f"{name}: does not use {index}\n{plan}")
+                )
+
+        if failures:
+            raise CommandError(
+                f"{len(failures)} query plan(s) miss their index: {', '.join(failures)}"
+            )
+        self.stdout.write(self.style.SUCCESS("Every query uses its index."))
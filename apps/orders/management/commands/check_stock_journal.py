@@ -0,0 +1,44 @@
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.orders.management.drift import DriftCheckCommand
+from apps.orders.models import Stock, StockMovement, StockMovementKind
+
+
+class Command(DriftCheckCommand):
+    help = (
+        "Compare the stock quantities with their movement journal and "
+        "optionally journal the differences as adjustments."
+    )
+    model = Stock
+    rows = "stock(s)"
+    consistent_message = "All stock quantities match their journal."
+    repair_help = "Record an adjustment for every stock that drifted"
+    repaired_message = "Journaled {count} stock(s)."
+
+    def get_drift(self, queryset):
+        journaled = Coalesce(
+            Subquery(
+                StockMovement.objects.filter(stock_id=OuterRef("pk"))
+                .order_by()
+                .values("stock_id")
+                .annotate(total=Sum("quantity"))
+                .values("total")[:1]
+            ),
+            Value(0),
+        )
+        drifted = (
+            queryset.annotate(journaled=journaled)
+            .exclude(quantity=F("journaled"))
+            .values_list("organization_id", "pk", "quantity", "journaled")
+        )
+        for organization_id, pk, quantity, journaled in drifted.iterator():
+            yield (
+                organization_id,
+                pk,
+                quantity - journaled,
+                f"Drifted stock: {pk} (quantity {quantity}, journal {journaled})",
+            )
+
+    def repair(self, organization_id, drift):
+        StockMovement.record(drift, StockMovementKind.ADJUSTMENT, organization_id)
@@ -0,0 +1,63 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class DriftCheckCommand(BaseCommand):
+    """
+    Compare values kept on write with what they are derived from, and with
+    ``--repair`` fix the rows that drifted, one transaction per organization.
+
+    Subclasses set ``model`` and the messages, and implement ``get_drift()``
+    and ``repair()``.
+    """
+
+    model = None
+    # Plural of the checked rows, for the messages.
+    rows = "rows"
+    consistent_message = ""
+    repair_help = ""
+    repaired_message = ""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--organization", help="Only check the organization with this slug"
+        )
+        parser.add_argument("--repair", action="store_true", help=self.repair_help)
+
+    def get_drift(self, queryset):
+        """Yield ``(organization_id, pk, drift, description)`` per drifted row."""
+        raise NotImplementedError
+
+    def repair(self, organization_id, drift):
+        """Fix the rows of an organization, given the ``drift`` per pk."""
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        queryset = self.model.objects.all()
+        if options["organization"]:
+            queryset = queryset.filter(organization__slug=options["organization"])
+
+        by_organization = defaultdict(dict)
+        for organization_id, pk, drift, description in self.get_drift(queryset):
+            by_organization[organization_id][pk] = drift
+            self.stdout.write(description)
+
+        count = sum(len(drift) for drift in by_organization.values())
+        if not count:
+            self.stdout.write(self.style.SUCCESS(self.consistent_message))
+            return
+
+        if not options["repair"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{count} {self.rows} drifted. Run with --repair to fix them."
+                )
+            )
+            return
+
+        for organization_id, drift in by_organization.items():
+            with transaction.atomic():
+                self.repair(organization_id, drift)
+        self.stdout.write(self.style.SUCCESS(self.repaired_message.format(count=count)))
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.3 on 2026-10-16 22:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0002_initial'),
+        ('orders', '0011_customer_prepaid_amount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='bulkcreditpayment',
+            name='sync_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='sync_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='facturation',
+            name='sync_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='sync_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='sync_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='bulkcreditpayment',
+            index=models.Index(fields=['organization', 'sync_seq', 'id'], name='orders_bulkcreditpayment_sync'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['organization', 'sync_seq', 'id'], name='orders_customer_sync'),
+        ),
+        migrations.AddIndex(
+            model_name='facturation',
+            index=models.Index(fields=['organization', 'sync_seq', 'id'], name='orders_facturation_sync'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['organization', 'sync_seq', 'id'], name='orders_stock_sync'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['organization', 'sync_seq', 'id'], name='orders_transaction_sync'),
+        ),
+        migrations.AddField(
+            model_name='syncsequence',
+            name='organization',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sync_sequence', to='organization.organization'),
+        ),
+    ]
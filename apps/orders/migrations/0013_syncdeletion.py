@@ -0,0 +1,34 @@
+# Generated by Django 4.2.3 on 2026-10-16 22:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0002_initial'),
+        ('orders', '0012_syncsequence_bulkcreditpayment_sync_seq_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncDeletion',
+            fields=[
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('sync_seq', models.BigIntegerField(default=0, editable=False)),
+                ('model_name', models.CharField(max_length=50)),
+                ('object_id', models.UUIDField()),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_deletions', to='organization.organization')),
+            ],
+            options={
+                'abstract': False,
+                'indexes': [models.Index(fields=['organization', 'sync_seq', 'id'], name='orders_syncdeletion_sync')],
+            },
+        ),
+    ]
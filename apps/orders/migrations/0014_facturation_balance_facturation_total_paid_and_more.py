@@ -0,0 +1,71 @@
+# Generated by Django 4.2.3 on 2026-10-16 22:44
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def line_sum(model, expression):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(facturation_id=OuterRef("pk"))
+            .values("facturation_id")
+            .annotate(total=Sum(expression))
+            .values("total")[:1]
+        ),
+        Value(Decimal("0")),
+        output_field=models.DecimalField(max_digits=19, decimal_places=4),
+    )
+
+
+def fill_totals(apps, schema_editor):
+    Facturation = apps.get_model("orders", "Facturation")
+    total_sales = line_sum(
+        apps.get_model("orders", "FacturationStock"), F("unit_price") * F("quantity")
+    )
+    total_paid = line_sum(apps.get_model("orders", "FacturationPayment"), F("amount"))
+    Facturation.objects.update(
+        total_sales=total_sales,
+        total_paid=total_paid,
+        total_refunded=line_sum(
+            apps.get_model("orders", "FacturationRefund"), F("amount")
+        ),
+        balance=total_sales - total_paid,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0013_syncdeletion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facturation',
+            name='balance',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=19),
+        ),
+        migrations.AddField(
+            model_name='facturation',
+            name='total_paid',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=19),
+        ),
+        migrations.AddField(
+            model_name='facturation',
+            name='total_refunded',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=19),
+        ),
+        migrations.AddField(
+            model_name='facturation',
+            name='total_sales',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=19),
+        ),
+        migrations.AddIndex(
+            model_name='facturation',
+            index=models.Index(fields=['organization', 'customer', 'balance'], name='orders_facturation_balance'),
+        ),
+        migrations.RunPython(fill_totals, migrations.RunPython.noop),
+    ]
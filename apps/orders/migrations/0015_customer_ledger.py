@@ -0,0 +1,116 @@
+# Generated by Django 4.2.3 on 2026-10-16 22:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+import uuid
+
+LEDGER_KINDS = (
+    ("sale", "total_sales"),
+    ("payment", "total_paid"),
+    ("refund", "total_refunded"),
+)
+
+
+def open_ledgers(apps, schema_editor):
+    """Post every facturation as of today as its customer's opening entries."""
+    Facturation = apps.get_model("orders", "Facturation")
+    Customer = apps.get_model("orders", "Customer")
+    CustomerLedgerEntry = apps.get_model("orders", "CustomerLedgerEntry")
+
+    def close(customer_id, totals, entries):
+        CustomerLedgerEntry.objects.bulk_create(entries, batch_size=1000)
+        Customer.objects.filter(pk=customer_id).update(
+            **totals, balance=totals["total_sales"] - totals["total_paid"]
+        )
+
+    facturations = (
+        Facturation.objects.filter(is_proforma=False)
+        .order_by("customer_id", "placed_at")
+        .values(
+            "pk",
+            "organization_id",
+            "customer_id",
+            "bill_number",
+            "placed_at",
+            *(name for _, name in LEDGER_KINDS),
+        )
+    )
+    customer_id, totals, entries = None, {}, []
+    for row in facturations.iterator(chunk_size=2000):
+        if row["customer_id"] != customer_id:
+            if customer_id is not None:
+                close(customer_id, totals, entries)
+            customer_id, entries = row["customer_id"], []
+            totals = {name: 0 for _, name in LEDGER_KINDS}
+        for kind, name in LEDGER_KINDS:
+            if not row[name]:
+                continue
+            totals[name] += row[name]
+            entries.append(
+                CustomerLedgerEntry(
+                    created=row["placed_at"],
+                    organization_id=row["organization_id"],
+                    customer_id=customer_id,
+                    facturation_id=row["pk"],
+                    reference=row["bill_number"] or "",
+                    kind=kind,
+                    amount=row[name],
+                    balance_after=totals["total_sales"] - totals["total_paid"],
+                )
+            )
+    if customer_id is not None:
+        close(customer_id, totals, entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0002_initial'),
+        ('orders', '0014_facturation_balance_facturation_total_paid_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='balance',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=19),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='total_paid',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=19),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='total_refunded',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=19),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='total_sales',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=19),
+        ),
+        migrations.CreateModel(
+            name='CustomerLedgerEntry',
+            fields=[
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('reference', models.CharField(blank=True, max_length=50)),
+                ('kind', models.CharField(choices=[('sale', 'Sale'), ('payment', 'Payment'), ('refund', 'Refund'), ('prepaid', 'Prepaid credit')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=4, max_digits=19)),
+                ('balance_after', models.DecimalField(decimal_places=4, max_digits=19)),
+                ('bulk_credit_payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='orders.bulkcreditpayment')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='orders.customer')),
+                ('facturation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='orders.facturation')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customer_ledger_entries', to='organization.organization')),
+            ],
+            options={
+                'ordering': ['created'],
+                'indexes': [models.Index(fields=['customer', 'created'], name='orders_ledger_customer')],
+            },
+        ),
+        migrations.RunPython(open_ledgers, migrations.RunPython.noop),
+    ]
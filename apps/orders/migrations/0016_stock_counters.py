@@ -0,0 +1,103 @@
+# Generated by Django 4.2.3 on 2026-10-16 22:57
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+import uuid
+
+
+def fill_counters(apps, schema_editor):
+    Batch = apps.get_model("orders", "Batch")
+    Item = apps.get_model("orders", "Item")
+    Stock = apps.get_model("orders", "Stock")
+    StockLevel = apps.get_model("orders", "StockLevel")
+
+    Item.objects.update(
+        quantity=Coalesce(
+            Subquery(
+                Batch.objects.filter(item_id=OuterRef("pk"))
+                .order_by()
+                .values("item_id")
+                .annotate(total=Sum("quantity"))
+                .values("total")[:1]
+            ),
+            Value(0),
+        )
+    )
+    totals = (
+        Stock.objects.order_by()
+        .values_list(
+            "batch__item_id",
+            "organization_user_id",
+            "organization_user__organization_id",
+        )
+        .annotate(total=Sum("quantity"))
+    )
+    StockLevel.objects.bulk_create(
+        (
+            StockLevel(
+                item_id=item_id,
+                organization_user_id=user_id,
+                organization_id=organization_id,
+                quantity=total,
+            )
+            for item_id, user_id, organization_id, total in totals.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0002_initial'),
+        ('orders', '0015_customer_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockLevel',
+            fields=[
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('quantity', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='quantity',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['organization', 'quantity'], name='orders_item_quantity'),
+        ),
+        migrations.AddField(
+            model_name='stocklevel',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_levels', to='orders.item'),
+        ),
+        migrations.AddField(
+            model_name='stocklevel',
+            name='organization',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_levels', to='organization.organization'),
+        ),
+        migrations.AddField(
+            model_name='stocklevel',
+            name='organization_user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_levels', to='organization.organizationuser'),
+        ),
+        migrations.AddIndex(
+            model_name='stocklevel',
+            index=models.Index(fields=['organization', 'item', 'quantity'], name='orders_stocklevel_item'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='stocklevel',
+            unique_together={('organization_user', 'item')},
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
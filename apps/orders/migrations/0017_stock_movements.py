@@ -0,0 +1,63 @@
+# Generated by Django 4.2.3 on 2026-10-16 23:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+import uuid
+
+
+def open_journal(apps, schema_editor):
+    """Journal the current quantity of every stock as its opening balance."""
+    Stock = apps.get_model("orders", "Stock")
+    StockMovement = apps.get_model("orders", "StockMovement")
+
+    stocks = (
+        Stock.objects.exclude(quantity=0)
+        .order_by()
+        .values_list("pk", "organization_id", "quantity")
+    )
+    StockMovement.objects.bulk_create(
+        (
+            StockMovement(
+                organization_id=organization_id,
+                stock_id=pk,
+                kind="opening",
+                quantity=quantity,
+                quantity_after=quantity,
+            )
+            for pk, organization_id, quantity in stocks.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0002_initial'),
+        ('orders', '0016_stock_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('opening', 'Opening balance'), ('sale', 'Sale'), ('delivery', 'Delivery'), ('return', 'Return to store'), ('adjustment', 'Adjustment'), ('refund', 'Refund')], max_length=20)),
+                ('quantity', models.IntegerField()),
+                ('quantity_after', models.IntegerField()),
+                ('facturation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='orders.facturation')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='organization.organization')),
+                ('organization_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='organization.organizationuser')),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='orders.stock')),
+            ],
+            options={
+                'ordering': ['created'],
+                'indexes': [models.Index(fields=['stock', 'created'], name='orders_movement_stock'), models.Index(fields=['organization', 'created'], name='orders_movement_org')],
+            },
+        ),
+        migrations.RunPython(open_journal, migrations.RunPython.noop),
+    ]
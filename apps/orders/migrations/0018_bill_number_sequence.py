@@ -0,0 +1,23 @@
+# Generated by Django 4.2.3 on 2026-10-16 23:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0002_initial'),
+        ('orders', '0017_stock_movements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillNumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+                ('organization', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='bill_number_sequence', to='organization.organization')),
+            ],
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.3 on 2026-10-16 23:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0019_time_ordered_keys'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(condition=models.Q(('quantity__gt', 0)), fields=['organization', 'expiration_date'], name='orders_batch_available'),
+        ),
+        migrations.AddIndex(
+            model_name='bulkcreditpayment',
+            index=models.Index(fields=['organization', 'modified'], name='orders_bulkcreditpayment_since'),
+        ),
+        migrations.AddIndex(
+            model_name='bulkcreditpayment',
+            index=models.Index(fields=['organization', 'organization_user', 'created'], name='orders_bulkpayment_seller'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['organization', 'modified'], name='orders_customer_since'),
+        ),
+        migrations.AddIndex(
+            model_name='facturation',
+            index=models.Index(fields=['organization', 'modified'], name='orders_facturation_since'),
+        ),
+        migrations.AddIndex(
+            model_name='facturation',
+            index=models.Index(condition=models.Q(('is_proforma', False)), fields=['organization', 'customer', 'placed_at'], name='orders_facturation_debt'),
+        ),
+        migrations.AddIndex(
+            model_name='facturation',
+            index=models.Index(fields=['organization', 'organization_user', 'placed_at'], name='orders_facturation_seller'),
+        ),
+        migrations.AddIndex(
+            model_name='facturation',
+            index=models.Index(fields=['organization', 'created'], name='orders_facturation_created'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['organization', 'modified'], name='orders_stock_since'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(condition=models.Q(('quantity__gt', 0)), fields=['organization', 'batch'], name='orders_stock_available'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['organization', 'modified'], name='orders_transaction_since'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['organization', 'organization_user', 'created'], name='orders_transaction_seller'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['organization', 'created'], name='orders_transaction_created'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.3 on 2026-10-16 23:41
+
+import time
+
+from django.db import migrations, models
+from django.db.models import Max
+import django.db.models.deletion
+
+# BillNumberSequence.BLOCK_SIZE
+BLOCK_SIZE = 20
+
+
+def create_sequence(apps, schema_editor):
+    """
+    Drop the counters of organizations that do not exist (reservations were
+    committed apart from the transactions creating them) and, on PostgreSQL,
+    create the sequence after every number handed out so far.
+    """
+    BillNumberSequence = apps.get_model("orders", "BillNumberSequence")
+    Organization = apps.get_model("organization", "Organization")
+    BillNumberSequence.objects.exclude(
+        organization_id__in=Organization.objects.values("pk")
+    ).delete()
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    highest = BillNumberSequence.objects.aggregate(value=Max("value"))["value"] or 0
+    start = max(int(time.time()), highest) + 1
+    schema_editor.execute(
+        f"CREATE SEQUENCE IF NOT EXISTS orders_bill_number "
+        f"INCREMENT BY {BLOCK_SIZE} START WITH {start}"
+    )
+
+
+def drop_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP SEQUENCE IF EXISTS orders_bill_number")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0002_initial'),
+        ('orders', '0020_access_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sequence, drop_sequence),
+        migrations.AlterField(
+            model_name='billnumbersequence',
+            name='organization',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='bill_number_sequence', to='organization.organization'),
+        ),
+    ]
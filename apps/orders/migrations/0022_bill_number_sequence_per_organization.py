@@ -0,0 +1,81 @@
+import time
+import uuid
+
+from django.db import migrations
+from django.db.models import Max
+
+# BillNumberSequence.BLOCK_SIZE
+BLOCK_SIZE = 20
+GLOBAL_SEQUENCE = "orders_bill_number"
+
+
+def sequence_name(organization_id):
+    return f"orders_bill_number_{uuid.UUID(str(organization_id)).hex}"
+
+
+def last_value(cursor, sequence):
+    cursor.execute(f"SELECT last_value FROM {sequence}")
+    return cursor.fetchone()[0]
+
+
+def create_sequences(apps, schema_editor):
+    """
+    Give every organization its own sequence, after every number handed out
+    by the global one, and drop it.
+    """
+    BillNumberSequence = apps.get_model("orders", "BillNumberSequence")
+    Organization = apps.get_model("organization", "Organization")
+    start = int(time.time())
+    postgresql = schema_editor.connection.vendor == "postgresql"
+    if postgresql:
+        with schema_editor.connection.cursor() as cursor:
+            start = max(start, last_value(cursor, GLOBAL_SEQUENCE) + BLOCK_SIZE)
+    start = max(
+        start, BillNumberSequence.objects.aggregate(value=Max("value"))["value"] or 0
+    )
+    BillNumberSequence.objects.bulk_create(
+        BillNumberSequence(organization_id=pk, value=start)
+        for pk in Organization.objects.filter(
+            bill_number_sequence__isnull=True
+        ).values_list("pk", flat=True)
+    )
+    if not postgresql:
+        return
+    BillNumberSequence.objects.update(value=start)
+    for organization_id in BillNumberSequence.objects.values_list(
+        "organization_id", flat=True
+    ):
+        schema_editor.execute(
+            f"CREATE SEQUENCE {sequence_name(organization_id)} "
+            f"INCREMENT BY {BLOCK_SIZE} START WITH {start + 1}"
+        )
+    schema_editor.execute(f"DROP SEQUENCE {GLOBAL_SEQUENCE}")
+
+
+def drop_sequences(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    BillNumberSequence = apps.get_model("orders", "BillNumberSequence")
+    start = int(time.time())
+    with schema_editor.connection.cursor() as cursor:
+        for organization_id in BillNumberSequence.objects.values_list(
+            "organization_id", flat=True
+        ):
+            sequence = sequence_name(organization_id)
+            start = max(start, last_value(cursor, sequence) + BLOCK_SIZE)
+            cursor.execute(f"DROP SEQUENCE {sequence}")
+    schema_editor.execute(
+        f"CREATE SEQUENCE {GLOBAL_SEQUENCE} "
+        f"INCREMENT BY {BLOCK_SIZE} START WITH {start + 1}"
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("organization", "0002_initial"),
+        ("orders", "0021_bill_number_database_sequence"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sequences, drop_sequences),
+    ]
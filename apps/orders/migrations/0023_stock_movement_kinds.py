@@ -0,0 +1,26 @@
+# Generated by Django 4.2.3 on 2026-10-17 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0022_bill_number_sequence_per_organization"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="stockmovement",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("opening", "Opening balance"),
+                    ("sale", "Sale"),
+                    ("delivery", "Delivery"),
+                    ("return", "Return to store"),
+                    ("adjustment", "Adjustment"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
@@ -1,21 +1,249 @@
+import operator
+import threading
+import time
+import uuid
 from datetime import datetime
-from decimal import Decimal
+from decimal import ROUND_DOWN, Decimal
+from functools import reduce
 
 from django.conf import settings
 from django.core.validators import (
     MinValueValidator,
 )
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models import (
+    Case,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from apps.core.fields import ProfessionalBillNumberField, QuantaField
-from apps.core.models import BaseModel
+from apps.core.models import BaseModel, TimeOrderedModel
 from apps.orders import managers
 from apps.organization.models import Organization, OrganizationUser, OrgFeatureManager
 
 User = settings.AUTH_USER_MODEL
 
 
-class Customer(BaseModel):
+class SyncSequence(models.Model):
+    """
+    Per-organization change counter backing the data API sync cursors.
+
+    Allocating a value updates the organization's row, which keeps it locked
+    until the surrounding transaction commits. Writers of the same
+    organization are therefore serialized and sequence values become visible
+    in increasing order, so a client never skips a row committed late.
+    """
+
+    organization = models.OneToOneField(
+        Organization, on_delete=models.CASCADE, related_name="sync_sequence"
+    )
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.organization_id} | {self.value}"
+
+    @classmethod
+    def next_value(cls, organization_id):
+        """Allocate the next change sequence value of an organization."""
+        with transaction.atomic():
+            updated = cls.objects.filter(organization_id=organization_id).update(
+                value=F("value") + 1
+            )
+            if not updated:
+                cls.objects.get_or_create(organization_id=organization_id)
+                cls.objects.filter(organization_id=organization_id).update(
+                    value=F("value") + 1
+                )
+            return cls.objects.values_list("value", flat=True).get(
+                organization_id=organization_id
+            )
+
+    @classmethod
+    def touch(cls, queryset, organization_id, **values):
+        """
+        Mark every row of ``queryset`` as changed for the sync API, applying
+        ``values`` in the same UPDATE.
+        """
+        return queryset.update(
+            sync_seq=cls.next_value(organization_id),
+            modified=timezone.now(),
+            **values,
+        )
+
+
+class BillNumberSequence(models.Model):
+    """
+    Bill number sequence of an organization, shared by all its billed
+    documents. The row is created with the organization.
+
+    On PostgreSQL the row owns a database sequence of the organization,
+    created and dropped with it, which moves ``BLOCK_SIZE`` numbers per
+    ``nextval``: each worker thread takes a block and hands its numbers out
+    from memory. ``nextval`` is never rolled back, so a block is never handed
+    out twice, and it never waits on other transactions. The numbers of an
+    organization are unique and increase per worker, with gaps where a block
+    is left unused. Other databases move ``value`` one number at a time
+    within the caller's transaction.
+
+    Numbering starts at the current Unix time, after the timestamp numbers
+    handed out before sequences existed.
+    """
+
+    organization = models.OneToOneField(
+        Organization, on_delete=models.CASCADE, related_name="bill_number_sequence"
+    )
+    # The last number handed out, on databases without sequences.
+    value = models.BigIntegerField(default=0)
+
+    BLOCK_SIZE = 20
+
+    _local = threading.local()
+
+    def __str__(self) -> str:
+        return f"{self.organization_id} | {self.value}"
+
+    @staticmethod
+    def sequence_name(organization_id):
+        return f"orders_bill_number_{uuid.UUID(str(organization_id)).hex}"
+
+    @classmethod
+    def create(cls, organization_id, start=None):
+        """Start the numbering of an organization."""
+        if start is None:
+            start = int(time.time())
+        sequence = cls.objects.create(organization_id=organization_id, value=start)
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE SEQUENCE {cls.sequence_name(organization_id)} "
+                    f"INCREMENT BY {cls.BLOCK_SIZE} START WITH {start + 1}"
+                )
+        return sequence
+
+    def drop(self):
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "DROP SEQUENCE IF EXISTS "
+                    f"{self.sequence_name(self.organization_id)}"
+                )
+
+    @classmethod
+    def next_value(cls, organization_id):
+        """Allocate the next bill number of an organization."""
+        blocks = cls._local.__dict__.setdefault("blocks", {})
+        value, end = blocks.get(organization_id, (0, 0))
+        if value >= end:
+            connection = connections[DEFAULT_DB_ALIAS]
+            if connection.vendor != "postgresql":
+                return cls.reserve(organization_id)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT nextval(%s)", [cls.sequence_name(organization_id)]
+                )
+                value = cursor.fetchone()[0] - 1
+            end = value + cls.BLOCK_SIZE
+        value += 1
+        blocks[organization_id] = (value, end)
+        return value
+
+    @classmethod
+    def reserve(cls, organization_id):
+        """Move the counter row of an organization forward, returning it."""
+        with transaction.atomic():
+            sequences = cls.objects.filter(organization_id=organization_id)
+            if not sequences.update(value=F("value") + 1):
+                cls.create(organization_id, int(time.time()) + 1)
+            return sequences.values_list("value", flat=True).get()
+
+
+class SyncedModel(BaseModel):
+    """
+    Rows exposed through the data API ``*-changes/`` endpoints.
+
+    Every save stamps the row with the next value of its organization's
+    ``SyncSequence``; clients page through changes ordered by
+    ``(sync_seq, id)``. Writes that bypass ``save()`` (``update()``,
+    ``bulk_update()``) must stamp the rows themselves.
+    """
+
+    sync_seq = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+        indexes = [
+            models.Index(
+                fields=["organization", "sync_seq", "id"],
+                name="%(app_label)s_%(class)s_sync",
+            ),
+            # Clients still syncing with ``?since=<timestamp>``.
+            models.Index(
+                fields=["organization", "modified"],
+                name="%(app_label)s_%(class)s_since",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            self.sync_seq = SyncSequence.next_value(self.organization_id)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "sync_seq"}
+            super().save(*args, **kwargs)
+
+
+class MaterializedTotalsMixin:
+    """
+    Models carrying ``TOTAL_FIELDS`` maintained by queryset updates.
+
+    Saving a loaded instance never writes them back, as they may have changed
+    since it was read; only the code owning the totals sets them.
+    """
+
+    TOTAL_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.TOTAL_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+class SyncDeletion(SyncedModel):
+    """
+    Tombstone of a synced row, served by the data API ``deletions-since/``
+    endpoint on the same change sequence as the ``*-changes/`` endpoints.
+    """
+
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="sync_deletions"
+    )
+    model_name = models.CharField(max_length=50)
+    object_id = models.UUIDField()
+
+    class Meta(SyncedModel.Meta):
+        # Tombstones are only read through the cursor, never ``?since=``.
+        indexes = SyncedModel.Meta.indexes[:1]
+
+    def __str__(self) -> str:
+        return f"{self.model_name} | {self.object_id}"
+
+
+class Customer(MaterializedTotalsMixin, SyncedModel):
     """
     The ``Customer`` model represents a Customer of the online
     store or offline. It wraps Django's built-in ``auth.User`` model, which
@@ -34,16 +262,38 @@ class Customer(BaseModel):
         default=0.0,
         validators=[MinValueValidator(Decimal("0.0"))],
     )
+    # Running snapshot of the ledger, moved by CustomerLedgerEntry.post();
+    # manual edits of the prepaid credit are posted as PREPAID entries.
     prepaid_amount = models.DecimalField(
         max_digits=19,
         decimal_places=4,
         default=0.0,
         validators=[MinValueValidator(Decimal("0.0"))],
     )
+    total_sales = models.DecimalField(
+        max_digits=19, decimal_places=4, default=0, editable=False
+    )
+    total_paid = models.DecimalField(
+        max_digits=19, decimal_places=4, default=0, editable=False
+    )
+    total_refunded = models.DecimalField(
+        max_digits=19, decimal_places=4, default=0, editable=False
+    )
+    balance = models.DecimalField(
+        max_digits=19, decimal_places=4, default=0, editable=False
+    )
 
     objects = OrgFeatureManager()
 
-    class Meta:
+    TOTAL_FIELDS = (
+        "prepaid_amount",
+        "total_sales",
+        "total_paid",
+        "total_refunded",
+        "balance",
+    )
+
+    class Meta(SyncedModel.Meta):
         unique_together = [
             # ("organization", "user"),
             # ("organization", "phone_number"),
@@ -106,7 +356,7 @@ class Category(BaseModel):
         return f"{self.name}"
 
 
-class Item(BaseModel):
+class Item(MaterializedTotalsMixin, BaseModel):
     """
     The ``Product`` model represents a product in the online
     store or offline. It wraps Django's built-in ``auth.User`` model, which
@@ -128,6 +378,8 @@ class Item(BaseModel):
     is_active = models.BooleanField(
         default=True,
     )
+    # On-hand quantity over all batches, maintained by update_quantities().
+    quantity = models.IntegerField(default=0, editable=False)
 
     @property
     def is_alert(self):
@@ -137,12 +389,10 @@ class Item(BaseModel):
     def total_quantity(self):
         return self.quantity
 
-    @property
-    def quantity(self):
-        return sum(batch.quantity for batch in self.batchs.all())
-
     objects = managers.BatchManager()
 
+    TOTAL_FIELDS = ("quantity",)
+
     # def save(self, *args, **kwargs):
     #     self.slug = f"{slugify(self.name)}-{slugify(self.organization.name)}"
     #     super(Product, self).save(*args, **kwargs)
@@ -152,6 +402,30 @@ class Item(BaseModel):
 
     class Meta:
         unique_together = [("organization", "name")]
+        indexes = [
+            models.Index(
+                fields=["organization", "quantity"], name="orders_item_quantity"
+            )
+        ]
+
+    @classmethod
+    def update_quantities(cls, queryset):
+        """
+        Recompute the on-hand quantity of the items in ``queryset`` from their
+        batches, in a single UPDATE.
+        """
+        return queryset.update(
+            quantity=Coalesce(
+                Subquery(
+                    Batch.objects.filter(item_id=OuterRef("pk"))
+                    .order_by()
+                    .values("item_id")
+                    .annotate(total=Sum("quantity"))
+                    .values("total")[:1]
+                ),
+                Value(0),
+            )
+        )
 
 
 class Batch(BaseModel):
@@ -215,8 +489,34 @@ class Batch(BaseModel):
     def __str__(self):
         return f"{self.item.name} ({self.expiration_date}) | {self.facturation_price.quantize(Decimal('1.'))} FCFA"
 
+    class Meta:
+        indexes = [
+            # Batch autocomplete: batches in stock, soonest expiring first.
+            models.Index(
+                fields=["organization", "expiration_date"],
+                condition=Q(quantity__gt=0),
+                name="orders_batch_available",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            item_ids = {self.item_id}
+            if not self._state.adding:
+                item_ids.update(
+                    Batch.objects.filter(pk=self.pk).values_list("item_id", flat=True)
+                )
+            super().save(*args, **kwargs)
+            Item.update_quantities(Item.objects.filter(pk__in=item_ids))
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            Item.update_quantities(Item.objects.filter(pk=self.item_id))
+        return deleted
+
 
-class Stock(BaseModel):
+class Stock(SyncedModel):
     organization = models.ForeignKey(
         Organization, on_delete=models.CASCADE, related_name="stocks"
     )
@@ -232,12 +532,283 @@ class Stock(BaseModel):
     def __str__(self):
         return f"{str(self.batch)} - {str(self.organization_user)}"
 
-    class Meta:
+    class Meta(SyncedModel.Meta):
         unique_together = ("organization", "organization_user", "batch")
+        indexes = [
+            *SyncedModel.Meta.indexes,
+            # Stock autocomplete only offers stocks that are not empty.
+            models.Index(
+                fields=["organization", "batch"],
+                condition=Q(quantity__gt=0),
+                name="orders_stock_available",
+            ),
+        ]
         permissions = [
             ("change_stockprice", "Can change stock price"),
         ]
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            stocks = Stock.objects.filter(pk=self.pk)
+            adding = self._state.adding
+            before = None
+            if not adding:
+                before = stocks.values_list(
+                    "quantity", "batch__item_id", "organization_user_id"
+                ).first()
+            super().save(*args, **kwargs)
+
+            holders = StockLevel.holders(stocks)
+            if before is not None:
+                holders.add(before[1:])
+            StockLevel.refresh(holders)
+
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None or "quantity" in update_fields:
+                StockMovement.record(
+                    {self.pk: self.quantity - (before[0] if before else 0)},
+                    StockMovementKind.OPENING
+                    if adding
+                    else StockMovementKind.ADJUSTMENT,
+                    self.organization_id,
+                )
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            holders = StockLevel.holders(Stock.objects.filter(pk=self.pk))
+            deleted = super().delete(*args, **kwargs)
+            StockLevel.refresh(holders)
+        return deleted
+
+    @classmethod
+    def move(
+        cls,
+        deltas,
+        kind,
+        organization_id,
+        organization_user_id=None,
+        facturation_id=None,
+    ):
+        """
+        Add ``deltas`` (quantity per stock id) to the stocks in a single
+        UPDATE, journal them as ``kind`` movements and refresh the stock
+        levels they belong to.
+        """
+        deltas = {pk: delta for pk, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        stocks = cls.objects.filter(pk__in=deltas)
+        with transaction.atomic():
+            SyncSequence.touch(
+                stocks,
+                organization_id,
+                quantity=F("quantity")
+                + Case(
+                    *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+                    output_field=models.IntegerField(),
+                ),
+            )
+            StockMovement.record(
+                deltas, kind, organization_id, organization_user_id, facturation_id
+            )
+            StockLevel.refresh(StockLevel.holders(stocks))
+
+
+class StockLevel(BaseModel):
+    """
+    On-hand quantity of an item held by an organization user, summed over
+    their stocks. Writers of ``Stock.quantity`` that bypass ``save()`` must
+    call ``refresh()`` in the same transaction.
+    """
+
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="stock_levels"
+    )
+    organization_user = models.ForeignKey(
+        OrganizationUser, on_delete=models.CASCADE, related_name="stock_levels"
+    )
+    item = models.ForeignKey(
+        Item, on_delete=models.CASCADE, related_name="stock_levels"
+    )
+    quantity = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("organization_user", "item")
+        indexes = [
+            models.Index(
+                fields=["organization", "item", "quantity"],
+                name="orders_stocklevel_item",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} | {self.organization_user_id} | {self.quantity}"
+
+    @staticmethod
+    def holders(stocks):
+        """The ``(item_id, organization_user_id)`` pairs holding ``stocks``."""
+        return set(
+            stocks.order_by()
+            .values_list("batch__item_id", "organization_user_id")
+            .distinct()
+        )
+
+    @classmethod
+    def refresh(cls, holders):
+        """
+        Recompute the levels of ``holders`` from their stocks in a fixed
+        number of queries, dropping the levels nothing is held for anymore.
+        """
+        if not holders:
+            return
+        item_ids, user_ids = zip(*holders)
+        totals = (
+            Stock.objects.filter(
+                batch__item_id__in=item_ids, organization_user_id__in=user_ids
+            )
+            .order_by()
+            .values_list(
+                "batch__item_id",
+                "organization_user_id",
+                "organization_user__organization_id",
+            )
+            .annotate(total=Sum("quantity"))
+        )
+        levels = [
+            cls(
+                organization_id=organization_id,
+                organization_user_id=user_id,
+                item_id=item_id,
+                quantity=total,
+            )
+            for item_id, user_id, organization_id, total in totals
+            if (item_id, user_id) in holders
+        ]
+        cls.objects.bulk_create(
+            levels,
+            update_conflicts=True,
+            unique_fields=["organization_user", "item"],
+            update_fields=["quantity", "modified"],
+        )
+
+        empty = holders - {
+            (level.item_id, level.organization_user_id) for level in levels
+        }
+        if empty:
+            cls.objects.filter(
+                reduce(
+                    operator.or_,
+                    (
+                        Q(item_id=item_id, organization_user_id=user_id)
+                        for item_id, user_id in empty
+                    ),
+                )
+            ).delete()
+
+
+class StockMovementKind(models.TextChoices):
+    OPENING = ("opening", "Opening balance")
+    SALE = ("sale", "Sale")
+    DELIVERY = ("delivery", "Delivery")
+    RETURN = ("return", "Return to store")
+    ADJUSTMENT = ("adjustment", "Adjustment")
+
+
+class StockMovement(TimeOrderedModel):
+    """
+    Append-only journal of the changes of ``Stock.quantity``.
+
+    ``Stock.quantity`` is the cached projection of the journal: every
+    movement stores its signed ``quantity`` and the stock's ``quantity_after``
+    it, so the quantity as of any date is the ``quantity_after`` of the last
+    movement before it, read from the ``(stock, created)`` index.
+    """
+
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="stock_movements"
+    )
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name="movements")
+    organization_user = models.ForeignKey(
+        OrganizationUser,
+        on_delete=models.SET_NULL,
+        related_name="stock_movements",
+        null=True,
+        blank=True,
+    )
+    facturation = models.ForeignKey(
+        "Facturation",
+        on_delete=models.SET_NULL,
+        related_name="stock_movements",
+        null=True,
+        blank=True,
+    )
+    kind = models.CharField(max_length=20, choices=StockMovementKind.choices)
+    quantity = models.IntegerField()
+    quantity_after = models.IntegerField()
+
+    class Meta:
+        ordering = ["created"]
+        indexes = [
+            models.Index(fields=["stock", "created"], name="orders_movement_stock"),
+            models.Index(
+                fields=["organization", "created"], name="orders_movement_org"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.stock_id} | {self.kind} | {self.quantity}"
+
+    @classmethod
+    def record(
+        cls,
+        deltas,
+        kind,
+        organization_id,
+        organization_user_id=None,
+        facturation_id=None,
+    ):
+        """
+        Journal ``deltas`` (quantity per stock id) already applied to the
+        stocks, in one INSERT.
+        """
+        deltas = {pk: delta for pk, delta in deltas.items() if delta}
+        if not deltas:
+            return []
+        quantities = dict(
+            Stock.objects.filter(pk__in=deltas).values_list("pk", "quantity")
+        )
+        return cls.objects.bulk_create(
+            [
+                cls(
+                    organization_id=organization_id,
+                    stock_id=pk,
+                    organization_user_id=organization_user_id,
+                    facturation_id=facturation_id,
+                    kind=kind,
+                    quantity=delta,
+                    quantity_after=quantities[pk],
+                )
+                for pk, delta in deltas.items()
+                if pk in quantities
+            ]
+        )
+
+    @classmethod
+    def quantity_as_of(cls, moment):
+        """
+        Expression of a stock's quantity at ``moment``, to annotate a
+        ``Stock`` queryset with.
+        """
+        return Coalesce(
+            Subquery(
+                cls.objects.filter(stock_id=OuterRef("pk"), created__lte=moment)
+                .order_by("-created")
+                .values("quantity_after")[:1]
+            ),
+            Value(0),
+        )
+
 
 class AbstractFacturation(BaseModel):
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
@@ -306,7 +877,9 @@ class AbstractFacturationStock(BaseModel):
         abstract = True
 
 
-class Facturation(AbstractFacturation):
+class Facturation(
+    MaterializedTotalsMixin, TimeOrderedModel, SyncedModel, AbstractFacturation
+):
     """
     The ``Facturation`` model represents a Customer order. It includes a
     ManyToManyField of products the Customer is ordering and stores
@@ -321,9 +894,46 @@ class Facturation(AbstractFacturation):
 
     is_delivered = models.BooleanField(default=True)
     is_proforma = models.BooleanField(default=False)
+
+    # Materialized from the lines by update_totals(); refunds are tracked
+    # apart and, as on every screen so far, do not change the balance.
+    total_sales = models.DecimalField(
+        max_digits=19, decimal_places=4, default=0, editable=False
+    )
+    total_paid = models.DecimalField(
+        max_digits=19, decimal_places=4, default=0, editable=False
+    )
+    total_refunded = models.DecimalField(
+        max_digits=19, decimal_places=4, default=0, editable=False
+    )
+    balance = models.DecimalField(
+        max_digits=19, decimal_places=4, default=0, editable=False
+    )
     objects = managers.FacturationManager()
 
-    class Meta:
+    TOTAL_FIELDS = ("total_sales", "total_paid", "total_refunded", "balance")
+
+    class Meta(SyncedModel.Meta):
+        indexes = [
+            *SyncedModel.Meta.indexes,
+            models.Index(
+                fields=["organization", "customer", "balance"],
+                name="orders_facturation_balance",
+            ),
+            # Customer debt: invoices of a customer, oldest first.
+            models.Index(
+                fields=["organization", "customer", "placed_at"],
+                condition=Q(is_proforma=False),
+                name="orders_facturation_debt",
+            ),
+            models.Index(
+                fields=["organization", "organization_user", "placed_at"],
+                name="orders_facturation_seller",
+            ),
+            models.Index(
+                fields=["organization", "created"], name="orders_facturation_created"
+            ),
+        ]
         permissions = [
             ("deliver_facturation", "Can deliver facturation"),
             ("print_facturation", "Can print facturation"),
@@ -332,6 +942,94 @@ class Facturation(AbstractFacturation):
     def __str__(self) -> str:
         return f"{self.customer} | {self.bill_number}"
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            moved = None
+            if not self._state.adding:
+                moved = (
+                    Facturation.objects.filter(pk=self.pk, is_proforma=False)
+                    .exclude(customer_id=self.customer_id)
+                    .values("customer_id", *self.TOTAL_FIELDS)
+                    .first()
+                )
+            super().save(*args, **kwargs)
+            if moved is not None:
+                # Move the facturation's totals to its new customer's ledger.
+                CustomerLedgerEntry.post(
+                    CustomerLedgerEntry.for_change(
+                        self, moved["customer_id"], moved, {}
+                    )
+                    + CustomerLedgerEntry.for_change(self, self.customer_id, {}, moved)
+                )
+
+    @staticmethod
+    def totals_expressions(stock_model, payment_model, refund_model):
+        """UPDATE expressions recomputing the totals from the line tables."""
+
+        def line_sum(model, expression):
+            return Coalesce(
+                Subquery(
+                    model.objects.filter(facturation_id=OuterRef("pk"))
+                    .values("facturation_id")
+                    .annotate(total=Sum(expression))
+                    .values("total")[:1]
+                ),
+                Value(Decimal("0")),
+                output_field=models.DecimalField(max_digits=19, decimal_places=4),
+            )
+
+        total_sales = line_sum(stock_model, F("unit_price") * F("quantity"))
+        total_paid = line_sum(payment_model, F("amount"))
+        return {
+            "total_sales": total_sales,
+            "total_paid": total_paid,
+            "total_refunded": line_sum(refund_model, F("amount")),
+            "balance": total_sales - total_paid,
+        }
+
+    @classmethod
+    def update_totals(cls, queryset, organization_id):
+        """
+        Recompute the totals of the facturations in ``queryset`` and mark them
+        as changed for the sync API, in a single UPDATE, then post the
+        differences to their customers' ledgers.
+
+        The customers are locked first so concurrent writers of the same
+        customer never read the same "before" totals.
+        """
+        with transaction.atomic():
+            list(
+                Customer.objects.select_for_update()
+                .filter(pk__in=queryset.values("customer_id"))
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            before = {
+                row["pk"]: row
+                for row in queryset.filter(is_proforma=False).values(
+                    "pk", *cls.TOTAL_FIELDS
+                )
+            }
+            updated = SyncSequence.touch(
+                queryset,
+                organization_id,
+                **cls.totals_expressions(
+                    FacturationStock, FacturationPayment, FacturationRefund
+                ),
+            )
+            entries = []
+            for facturation in cls.objects.filter(pk__in=before).only(
+                "organization_id", "customer_id", "bill_number", *cls.TOTAL_FIELDS
+            ):
+                entries += CustomerLedgerEntry.for_change(
+                    facturation,
+                    facturation.customer_id,
+                    before[facturation.pk],
+                    {name: getattr(facturation, name) for name in cls.TOTAL_FIELDS},
+                )
+            CustomerLedgerEntry.post(entries)
+        return updated
+
     @property
     def total_amount_paid(self):
         """Calculate total amount already paid for this facturation"""
@@ -343,7 +1041,33 @@ class Facturation(AbstractFacturation):
         return self.total_price - self.total_amount_paid
 
 
-class FacturationStock(AbstractFacturationStock):
+class FacturationLineMixin:
+    """
+    Rows adding up into their facturation's totals: saving or deleting one
+    recomputes the totals and marks the facturation as changed so the data
+    API resends it. Bulk writes must call ``Facturation.update_totals()``.
+    """
+
+    def _update_facturation(self):
+        Facturation.update_totals(
+            Facturation.objects.filter(pk=self.facturation_id), self.organization_id
+        )
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._update_facturation()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            self._update_facturation()
+        return deleted
+
+
+class FacturationStock(
+    FacturationLineMixin, TimeOrderedModel, AbstractFacturationStock
+):
     """
     The ``FacturationStock`` model represents information about a
     specific product ordered by a patient.
@@ -383,7 +1107,7 @@ class TransactionType(models.TextChoices):
     DEPOSIT = ("deposit", "Deposit")
 
 
-class Transaction(BaseModel):
+class Transaction(TimeOrderedModel, SyncedModel):
     organization = models.ForeignKey(
         Organization, related_name="transactions", on_delete=models.CASCADE
     )
@@ -404,13 +1128,23 @@ class Transaction(BaseModel):
     reason = models.CharField(max_length=100)
     objects = managers.DataViteManager()
 
-    class Meta:
+    class Meta(SyncedModel.Meta):
+        indexes = [
+            *SyncedModel.Meta.indexes,
+            models.Index(
+                fields=["organization", "organization_user", "created"],
+                name="orders_transaction_seller",
+            ),
+            models.Index(
+                fields=["organization", "created"], name="orders_transaction_created"
+            ),
+        ]
         permissions = [
             ("print_transaction", "Can print transaction"),
         ]
 
 
-class BulkCreditPayment(BaseModel):
+class BulkCreditPayment(SyncedModel):
     bill_number = ProfessionalBillNumberField(unique=False)
 
     customer = models.ForeignKey(
@@ -430,8 +1164,111 @@ class BulkCreditPayment(BaseModel):
     amount = models.DecimalField(max_digits=19, decimal_places=3)
     objects = OrgFeatureManager()
 
+    class Meta(SyncedModel.Meta):
+        indexes = [
+            *SyncedModel.Meta.indexes,
+            models.Index(
+                fields=["organization", "organization_user", "created"],
+                name="orders_bulkpayment_seller",
+            ),
+        ]
+
+    def allocate(self):
+        """
+        Settle the customer's unpaid facturations oldest first (FIFO) and
+        credit what is left over as prepaid credit.
+
+        The split comes from the running sum of the balances computed by the
+        database, and the payments are inserted together, so the number of
+        queries does not grow with the number of open facturations. The
+        customer row is locked first, which serializes concurrent payments of
+        the same customer. Returns the amount allocated per facturation id.
+        """
+        with transaction.atomic():
+            list(
+                Customer.objects.select_for_update()
+                .filter(pk=self.customer_id)
+                .values_list("pk", flat=True)
+            )
+            unpaid = (
+                Facturation.objects.filter(
+                    organization_id=self.organization_id,
+                    customer_id=self.customer_id,
+                    is_proforma=False,
+                    balance__gt=0,
+                )
+                .annotate(
+                    allocated_before=Window(
+                        Sum("balance"), order_by=[F("placed_at"), F("pk")]
+                    )
+                    - F("balance")
+                )
+                .filter(allocated_before__lt=self.amount)
+                .values_list("pk", "balance", "allocated_before")
+            )
+            # Balances have more decimal places than the payments storing
+            # them: round down so that nothing is allocated beyond the amount.
+            scale = Decimal(1).scaleb(
+                -FacturationPayment._meta.get_field("amount").decimal_places
+            )
+            allocations = {
+                pk: min(balance, self.amount - allocated_before).quantize(
+                    scale, rounding=ROUND_DOWN
+                )
+                for pk, balance, allocated_before in unpaid
+            }
+            allocations = {pk: amount for pk, amount in allocations.items() if amount}
+
+            if allocations:
+                FacturationPayment.objects.bulk_create(
+                    [
+                        FacturationPayment(
+                            facturation_id=facturation_id,
+                            organization_id=self.organization_id,
+                            bulk_credit_payment=self,
+                            organization_user_id=self.organization_user_id,
+                            transaction_broker=self.transaction_broker,
+                            amount=amount,
+                        )
+                        for facturation_id, amount in allocations.items()
+                    ]
+                )
+                Facturation.update_totals(
+                    Facturation.objects.filter(pk__in=allocations),
+                    self.organization_id,
+                )
+
+            leftover = self.amount - sum(allocations.values())
+            if leftover > 0:
+                CustomerLedgerEntry.post(
+                    [
+                        CustomerLedgerEntry(
+                            organization_id=self.organization_id,
+                            customer_id=self.customer_id,
+                            bulk_credit_payment=self,
+                            reference=self.bill_number,
+                            kind=LedgerEntryKind.PREPAID,
+                            amount=leftover,
+                        )
+                    ]
+                )
+        return allocations
+
+    def delete(self, *args, **kwargs):
+        # The allocated payments go with it (CASCADE) without their delete().
+        with transaction.atomic():
+            facturation_ids = list(
+                self.facturation_payments.values_list("facturation_id", flat=True)
+            )
+            deleted = super().delete(*args, **kwargs)
+            Facturation.update_totals(
+                Facturation.objects.filter(pk__in=facturation_ids),
+                self.organization_id,
+            )
+        return deleted
+
 
-class FacturationPayment(BaseModel):
+class FacturationPayment(FacturationLineMixin, TimeOrderedModel):
     facturation = models.ForeignKey(
         Facturation, related_name="facturation_payments", on_delete=models.CASCADE
     )
@@ -457,7 +1294,7 @@ class FacturationPayment(BaseModel):
     objects = OrgFeatureManager()
 
 
-class FacturationRefund(BaseModel):
+class FacturationRefund(FacturationLineMixin, BaseModel):
     organization = models.ForeignKey(
         Organization,
         related_name="facturation_FacturationRefunds",
@@ -484,3 +1321,118 @@ class FacturationRefund(BaseModel):
                 "bill_number",
             )
         ]
+
+
+class LedgerEntryKind(models.TextChoices):
+    SALE = ("sale", "Sale")
+    PAYMENT = ("payment", "Payment")
+    REFUND = ("refund", "Refund")
+    PREPAID = ("prepaid", "Prepaid credit")
+
+
+class CustomerLedgerEntry(TimeOrderedModel):
+    """
+    Append-only history of a customer's account.
+
+    Every change of a facturation's totals is posted as the difference it
+    makes (corrections and deletions are negative entries), and prepaid
+    credit left over by a ``BulkCreditPayment`` as a ``PREPAID`` entry.
+    ``post()`` moves the customer's snapshot columns along, so balances are
+    read from the customer row instead of summing their history.
+    """
+
+    organization = models.ForeignKey(
+        Organization, related_name="customer_ledger_entries", on_delete=models.CASCADE
+    )
+    customer = models.ForeignKey(
+        Customer, related_name="ledger_entries", on_delete=models.CASCADE
+    )
+    facturation = models.ForeignKey(
+        Facturation,
+        related_name="ledger_entries",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    bulk_credit_payment = models.ForeignKey(
+        BulkCreditPayment,
+        related_name="ledger_entries",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    reference = models.CharField(max_length=50, blank=True)
+    kind = models.CharField(max_length=20, choices=LedgerEntryKind.choices)
+    amount = models.DecimalField(max_digits=19, decimal_places=4)
+    balance_after = models.DecimalField(max_digits=19, decimal_places=4)
+    objects = OrgFeatureManager()
+
+    # Facturation total moved by each kind; prepaid credit is kept apart in
+    # Customer.prepaid_amount and, like refunds, leaves the balance alone.
+    KIND_TOTALS = {
+        LedgerEntryKind.SALE: "total_sales",
+        LedgerEntryKind.PAYMENT: "total_paid",
+        LedgerEntryKind.REFUND: "total_refunded",
+    }
+
+    class Meta:
+        ordering = ["created"]
+        indexes = [
+            models.Index(fields=["customer", "created"], name="orders_ledger_customer"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.customer_id} | {self.kind} | {self.amount}"
+
+    @classmethod
+    def for_change(cls, facturation, customer_id, before, after):
+        """
+        Entries moving ``customer_id`` by the change of a facturation's totals
+        from ``before`` to ``after`` (missing totals count as zero).
+        """
+        return [
+            cls(
+                organization_id=facturation.organization_id,
+                customer_id=customer_id,
+                facturation_id=facturation.pk,
+                reference=facturation.bill_number or "",
+                kind=kind,
+                amount=after.get(name, 0) - before.get(name, 0),
+            )
+            for kind, name in cls.KIND_TOTALS.items()
+        ]
+
+    @classmethod
+    def post(cls, entries):
+        """
+        Append the non-zero ``entries`` and move their customers' snapshots,
+        with the customers locked for the rest of the transaction.
+        """
+        entries = [entry for entry in entries if entry.amount]
+        if not entries:
+            return []
+
+        with transaction.atomic():
+            customers = {
+                customer.pk: customer
+                for customer in Customer.objects.select_for_update()
+                .filter(pk__in={entry.customer_id for entry in entries})
+                .order_by("pk")
+                .only("pk", *Customer.TOTAL_FIELDS)
+            }
+            for entry in entries:
+                customer = customers[entry.customer_id]
+                if entry.kind == LedgerEntryKind.PREPAID:
+                    customer.prepaid_amount += entry.amount
+                else:
+                    name = cls.KIND_TOTALS[entry.kind]
+                    setattr(customer, name, getattr(customer, name) + entry.amount)
+                customer.balance = customer.total_sales - customer.total_paid
+                entry.balance_after = customer.balance
+
+            cls.objects.bulk_create(entries)
+            for customer in customers.values():
+                Customer.objects.filter(pk=customer.pk).update(
+                    **{name: getattr(customer, name) for name in Customer.TOTAL_FIELDS}
+                )
+        return entries
@@ -0,0 +1,119 @@
+"""
+The hot queries of the main views and data API endpoints, and the index each
+one is designed to use.
+
+The querysets are built by the views' own ``get_queryset()`` on a request of
+an organization user, so the checks follow the views as they change.
+"""
+
+import time
+
+from dal import autocomplete
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import RequestFactory
+from rest_framework.views import APIView
+
+from apps.api.v1.data import views as data_views
+from apps.core.views import dal
+from apps.orders import views
+
+
+def view_queryset(view_class, request, **kwargs):
+    """
+    The queryset ``view_class`` lists for ``request``, limited to the first
+    page of paginated views as they run it.
+    """
+    view = view_class()
+    view.setup(request, **kwargs)
+    if isinstance(view, APIView):
+        view.request = view.initialize_request(request)
+        view.request.user = request.user
+    if isinstance(view, autocomplete.Select2QuerySetView):
+        view.q = ""
+        view.forwarded = {"organization": str(request.organization.pk)}
+    queryset = view.get_queryset()
+    paginate_by = getattr(view, "paginate_by", None)
+    return queryset[:paginate_by] if paginate_by else queryset
+
+
+def get_checks(organization_user, customer):
+    """``(name, queryset, index)`` of every checked query."""
+    organization = organization_user.organization
+
+    def request(**params):
+        request = RequestFactory().get("/", params)
+        request.user = organization_user.user
+        request.organization = organization
+        request.organization_user = organization_user
+        return request
+
+    # In milliseconds, as the app sends it.
+    since = {"since": int((time.time() - 24 * 60 * 60) * 1000)}
+    return [
+        (
+            "data API ?since= sync",
+            view_queryset(data_views.CustomerChangesView, request(**since)),
+            "orders_customer_since",
+        ),
+        (
+            "customer facturations",
+            view_queryset(
+                views.OrgCustomerFacturationListView,
+                request(),
+                organization=organization.slug,
+                customer=customer.pk,
+            ),
+            "orders_facturation_debt",
+        ),
+        (
+            "data API seller facturations",
+            view_queryset(data_views.FacturationListView, request()),
+            "orders_facturation_seller",
+        ),
+        (
+            "facturation list",
+            view_queryset(views.OrgFacturationListView, request()),
+            "orders_facturation_created",
+        ),
+        (
+            "data API seller transactions",
+            view_queryset(data_views.TransactionListAPIView, request()),
+            "orders_transaction_seller",
+        ),
+        (
+            "transaction list",
+            view_queryset(views.OrgTransactionListView, request()),
+            "orders_transaction_created",
+        ),
+        (
+            "data API seller bulk credit payments",
+            view_queryset(data_views.BulkCreditPaymentListAPIView, request()),
+            "orders_bulkpayment_seller",
+        ),
+        (
+            "batch autocomplete",
+            view_queryset(dal.OrgBatchAutocomplete, request()),
+            "orders_batch_available",
+        ),
+        (
+            "stock autocomplete",
+            view_queryset(dal.OrgStockAutocomplete, request()),
+            "orders_stock_available",
+        ),
+    ]
+
+
+def explain(queryset):
+    """
+    The plan of ``queryset``. PostgreSQL is kept off sequential scans, which
+    it prefers on small tables whatever their indexes.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != "postgresql":
+        return queryset.explain()
+    with connection.cursor() as cursor:
+        cursor.execute("SET enable_seqscan = off")
+        try:
+            return queryset.explain()
+        finally:
+            cursor.execute("RESET enable_seqscan")
@@ -1,3 +1,75 @@
+from django.db.models.signals import post_delete, post_save
+
+from apps.orders import models
+from apps.organization.models import Organization
+
+SYNCED_MODELS = (
+    models.Customer,
+    models.Stock,
+    models.Transaction,
+    models.Facturation,
+    models.BulkCreditPayment,
+)
+
+
+def record_sync_deletion(sender, instance, origin=None, **kwargs):
+    # Rows removed together with their organization have nobody left to sync.
+    if isinstance(origin, Organization):
+        return
+    models.SyncDeletion.objects.create(
+        organization_id=instance.organization_id,
+        model_name=sender._meta.model_name,
+        object_id=instance.pk,
+    )
+
+
+for model in SYNCED_MODELS:
+    post_delete.connect(
+        record_sync_deletion,
+        sender=model,
+        dispatch_uid=f"sync_deletion_{model._meta.model_name}",
+    )
+
+
+def reverse_facturation_ledger(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Organization) or instance.is_proforma:
+        return
+    totals = {name: getattr(instance, name) for name in instance.TOTAL_FIELDS}
+    entries = models.CustomerLedgerEntry.for_change(
+        instance, instance.customer_id, totals, {}
+    )
+    for entry in entries:
+        # The row is gone; the bill number stays as the entry's reference.
+        entry.facturation_id = None
+    models.CustomerLedgerEntry.post(entries)
+
+
+post_delete.connect(
+    reverse_facturation_ledger,
+    sender=models.Facturation,
+    dispatch_uid="facturation_ledger_reversal",
+)
+
+
+def start_bill_numbers(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        models.BillNumberSequence.create(instance.pk)
+
+
+def drop_bill_number_sequence(sender, instance, **kwargs):
+    instance.drop()
+
+
+post_save.connect(
+    start_bill_numbers, sender=Organization, dispatch_uid="bill_number_sequence"
+)
+post_delete.connect(
+    drop_bill_number_sequence,
+    sender=models.BillNumberSequence,
+    dispatch_uid="bill_number_sequence_deleted",
+)
+
+
 # stocks = order_models.FacturationStock.objects.filter(
 #     facturation=billing
 # )
@@ -1,3 +1,225 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.db import connection
+
+from apps.core.testing import (
+    OrganizationTestCase,
+    create_organization,
+    create_organization_user,
+    create_sale,
+    create_stock,
+)
+from apps.orders import models as order_models
+from apps.orders.query_plans import explain, get_checks
+
+
+class QueryPlanTests(OrganizationTestCase):
+    """The hot queries of the views are planned with the indexes made for them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # On empty tables the planner sees no difference between the indexes
+        # of the organization and of its sellers: give the seller a small
+        # share of the transactions and let the planner know.
+        sellers = [cls.organization_user] + [
+            create_organization_user(cls.organization) for _ in range(3)
+        ]
+        order_models.Transaction.objects.bulk_create(
+            order_models.Transaction(
+                organization=cls.organization,
+                organization_user=seller,
+                amount=Decimal(1),
+                participant="Client",
+                reason="Vente",
+            )
+            for seller in sellers
+            for _ in range(1 if seller == cls.organization_user else 100)
+        )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE orders_transaction")
+
+    def test_views_use_their_indexes(self):
+        for name, queryset, index in get_checks(self.organization_user, self.customer):
+            with self.subTest(name):
+                self.assertIn(index, explain(queryset))
+
+
+class StockJournalTests(OrganizationTestCase):
+    def test_new_stock_opens_the_journal(self):
+        stock = create_stock(self.organization_user, quantity=50)
+        stock.quantity = 46
+        stock.save()
+        self.assertEqual(
+            list(stock.movements.values_list("kind", "quantity", "quantity_after")),
+            [
+                (order_models.StockMovementKind.OPENING, 50, 50),
+                (order_models.StockMovementKind.ADJUSTMENT, -4, 46),
+            ],
+        )
+
+
+class BulkCreditPaymentAllocationTests(OrganizationTestCase):
+    def sell(self, *prices):
+        """One facturation of a unit per price, placed a day apart."""
+        facturations = []
+        for day, price in enumerate(prices, start=1):
+            stock = create_stock(self.organization_user, price=Decimal(price))
+            facturation = create_sale(
+                self.organization_user, self.customer, [(stock, 1)]
+            )
+            order_models.Facturation.objects.filter(pk=facturation.pk).update(
+                placed_at=datetime.datetime(2026, 3, day, tzinfo=datetime.UTC)
+            )
+            facturations.append(facturation)
+        return facturations
+
+    def pay(self, amount):
+        return order_models.BulkCreditPayment.objects.create(
+            organization=self.organization,
+            organization_user=self.organization_user,
+            customer=self.customer,
+            amount=Decimal(amount),
+        ).allocate()
+
+    def test_oldest_facturations_are_settled_first(self):
+        facturations = self.sell(10, 10, 10)
+        self.assertEqual(
+            self.pay(25),
+            {facturations[0].pk: 10, facturations[1].pk: 10, facturations[2].pk: 5},
+        )
+        self.customer.refresh_from_db()
+        self.assertEqual((self.customer.balance, self.customer.prepaid_amount), (5, 0))
+
+    def test_leftover_is_credited_as_prepaid(self):
+        (facturation,) = self.sell(10)
+        self.assertEqual(self.pay(12), {facturation.pk: 10})
+        self.assertEqual(self.pay(3), {})
+        self.customer.refresh_from_db()
+        self.assertEqual((self.customer.balance, self.customer.prepaid_amount), (0, 5))
+
+    def test_allocations_fit_the_payment_scale(self):
+        facturations = self.sell("10.0005", 10)
+        allocations = self.pay(15)
+        self.assertEqual(
+            allocations,
+            {
+                facturations[0].pk: Decimal("10.000"),
+                facturations[1].pk: Decimal("4.999"),
+            },
+        )
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.prepaid_amount, Decimal("0.001"))
+
+
+class CustomerLedgerTests(OrganizationTestCase):
+    def entries(self, customer):
+        return list(
+            customer.ledger_entries.values_list("kind", "amount", "balance_after")
+        )
+
+    def test_sale_and_payment_are_posted(self):
+        stock = create_stock(self.organization_user, price=Decimal(10))
+        create_sale(
+            self.organization_user, self.customer, [(stock, 2)], paid=Decimal(5)
+        )
+        self.assertEqual(
+            self.entries(self.customer),
+            [
+                (order_models.LedgerEntryKind.SALE, 20, 20),
+                (order_models.LedgerEntryKind.PAYMENT, 5, 15),
+            ],
+        )
+        self.customer.refresh_from_db()
+        self.assertEqual(
+            (
+                self.customer.total_sales,
+                self.customer.total_paid,
+                self.customer.balance,
+            ),
+            (20, 5, 15),
+        )
+
+    def test_moved_facturation_moves_its_totals(self):
+        stock = create_stock(self.organization_user, price=Decimal(10))
+        facturation = create_sale(self.organization_user, self.customer, [(stock, 1)])
+        other = order_models.Customer.objects.create(
+            organization=self.organization, name="Autre client"
+        )
+        facturation.customer = other
+        facturation.save()
+        self.customer.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.customer.balance, other.balance), (0, 10))
+        self.assertEqual(
+            self.entries(self.customer)[-1],
+            (order_models.LedgerEntryKind.SALE, -10, 0),
+        )
+
+    def test_deleted_facturation_is_reversed(self):
+        stock = create_stock(self.organization_user, price=Decimal(10))
+        facturation = create_sale(
+            self.organization_user, self.customer, [(stock, 1)], paid=Decimal(4)
+        )
+        facturation.delete()
+        self.customer.refresh_from_db()
+        self.assertEqual((self.customer.total_sales, self.customer.balance), (0, 0))
+        self.assertEqual(
+            sorted(
+                self.customer.ledger_entries.filter(amount__lt=0).values_list(
+                    "kind", "amount", "reference"
+                )
+            ),
+            [
+                (order_models.LedgerEntryKind.PAYMENT, -4, facturation.bill_number),
+                (order_models.LedgerEntryKind.SALE, -10, facturation.bill_number),
+            ],
+        )
+
+
+class BillNumberTests(OrganizationTestCase):
+    def bill_numbers(self, organization_user, customer, count):
+        return [
+            int(create_sale(organization_user, customer).bill_number)
+            for _ in range(count)
+        ]
+
+    def test_organizations_number_their_bills_apart(self):
+        other_user = create_organization_user(create_organization())
+        other_customer = order_models.Customer.objects.create(
+            organization=other_user.organization, name="Client"
+        )
+        count = order_models.BillNumberSequence.BLOCK_SIZE + 5
+        numbers, other_numbers = [], []
+        for _ in range(count):
+            numbers += self.bill_numbers(self.organization_user, self.customer, 1)
+            other_numbers += self.bill_numbers(other_user, other_customer, 1)
+        self.assertEqual(numbers, list(range(numbers[0], numbers[0] + count)))
+        self.assertEqual(
+            other_numbers, list(range(other_numbers[0], other_numbers[0] + count))
+        )
+
+    def test_documents_share_the_numbering(self):
+        (number,) = self.bill_numbers(self.organization_user, self.customer, 1)
+        payment = order_models.BulkCreditPayment.objects.create(
+            organization=self.organization,
+            organization_user=self.organization_user,
+            customer=self.customer,
+            amount=Decimal(1),
+        )
+        self.assertEqual(int(payment.bill_number), number + 1)
+
+    @skipUnless(connection.vendor == "postgresql", "sequences are PostgreSQL only")
+    def test_sequence_is_dropped_with_the_organization(self):
+        organization = create_organization()
+        name = order_models.BillNumberSequence.sequence_name(organization.pk)
+        query = "SELECT to_regclass(%s) IS NOT NULL"
+        with connection.cursor() as cursor:
+            cursor.execute(query, [name])
+            self.assertTrue(cursor.fetchone()[0])
+            organization.delete()
+            cursor.execute(query, [name])
+            self.assertFalse(cursor.fetchone()[0])
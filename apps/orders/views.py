@@ -1,4 +1,4 @@
-from decimal import Decimal
+from collections import defaultdict
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -8,14 +8,10 @@ from django.db.models import (
     DecimalField,
     ExpressionWrapper,
     F,
-    OuterRef,
     ProtectedError,
-    Subquery,
-    Sum,
     Value,
     When,
 )
-from django.db.models.functions import Coalesce
 from django.http import HttpResponseRedirect
 from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
@@ -53,93 +49,34 @@ class OrgCustomerListView(
         return ["orders/customer_list.html"]
 
     def get_queryset(self):
-        organization = self.request.organization
-
-        # Subquery for total sales
-        total_sales_subquery = (
-            models.Facturation.objects.filter(
-                organization=organization, customer_id=OuterRef("pk"), is_proforma=False
-            )
-            .values("customer_id")
-            .annotate(
-                total=Coalesce(
-                    Sum(
-                        F("facturation_stocks__unit_price")
-                        * F("facturation_stocks__quantity"),
-                        output_field=DecimalField(max_digits=19, decimal_places=4),
-                    ),
-                    Decimal("0"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                )
-            )
-            .values("total")[:1]
-        )
-
-        # Subquery for total paid
-        total_paid_subquery = (
-            models.FacturationPayment.objects.filter(
-                organization=organization, facturation__customer_id=OuterRef("pk")
-            )
-            .values("facturation__customer_id")
-            .annotate(
-                total=Coalesce(
-                    Sum(
-                        "amount",
-                        output_field=DecimalField(max_digits=19, decimal_places=4),
-                    ),
-                    Decimal("0"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                )
-            )
-            .values("total")[:1]
-        )
-
-        # Apply annotations
-        return (
-            models.Customer.objects.filter(organization=organization)
-            .annotate(
-                total_sales=Coalesce(
-                    Subquery(total_sales_subquery),
-                    Decimal("0"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
-                total_paid=Coalesce(
-                    Subquery(total_paid_subquery),
-                    Decimal("0"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
-            )
-            .annotate(
-                total_due=Coalesce(
-                    F("total_sales") - F("total_paid"),
-                    Decimal("0"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
-                # Payment progress percentage (how much of total sales is paid)
-                payment_progress=Case(
-                    When(
-                        total_sales__gt=0,
-                        then=ExpressionWrapper(
-                            (F("total_paid") * 100) / F("total_sales"),
-                            output_field=DecimalField(max_digits=5, decimal_places=1),
-                        ),
+        # Balances are read from the customer's ledger snapshot.
+        return models.Customer.objects.filter(
+            organization=self.request.organization
+        ).annotate(
+            # Payment progress percentage (how much of total sales is paid)
+            payment_progress=Case(
+                When(
+                    total_sales__gt=0,
+                    then=ExpressionWrapper(
+                        (F("total_paid") * 100) / F("total_sales"),
+                        output_field=DecimalField(max_digits=5, decimal_places=1),
                     ),
-                    default=Value(100),
-                    output_field=DecimalField(max_digits=5, decimal_places=1),
                 ),
-                # Credit utilization percentage (how much of credit limit is used)
-                credit_utilization=Case(
-                    When(
-                        credit_limit__gt=0,
-                        then=ExpressionWrapper(
-                            (F("total_due") * 100) / F("credit_limit"),
-                            output_field=DecimalField(max_digits=5, decimal_places=1),
-                        ),
+                default=Value(100),
+                output_field=DecimalField(max_digits=5, decimal_places=1),
+            ),
+            # Credit utilization percentage (how much of credit limit is used)
+            credit_utilization=Case(
+                When(
+                    credit_limit__gt=0,
+                    then=ExpressionWrapper(
+                        (F("balance") * 100) / F("credit_limit"),
+                        output_field=DecimalField(max_digits=5, decimal_places=1),
                     ),
-                    default=Value(0),
-                    output_field=DecimalField(max_digits=5, decimal_places=1),
                 ),
-            )
+                default=Value(0),
+                output_field=DecimalField(max_digits=5, decimal_places=1),
+            ),
         )
 
 
@@ -169,32 +106,7 @@ class OrgCustomerFacturationListView(
             models.Customer, pk=self.kwargs.get("customer")
         )
 
-        # Subquery to calculate total paid for each facturation
-        total_paid_subquery = (
-            models.FacturationPayment.objects.filter(facturation_id=OuterRef("pk"))
-            .values("facturation_id")
-            .annotate(
-                total=Sum(
-                    "amount", output_field=DecimalField(max_digits=19, decimal_places=4)
-                )
-            )
-            .values("total")[:1]
-        )
-
-        # Subquery to calculate total sales (unit_price * quantity) for each facturation
-        total_sales_subquery = (
-            models.FacturationStock.objects.filter(facturation_id=OuterRef("pk"))
-            .values("facturation_id")
-            .annotate(
-                total=Sum(
-                    F("unit_price") * F("quantity"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                )
-            )
-            .values("total")[:1]
-        )
-
-        # Get facturations with annotations
+        # Get facturations with their materialized totals
         facturations = (
             models.Facturation.objects.filter(
                 organization=self.request.organization,
@@ -203,23 +115,6 @@ class OrgCustomerFacturationListView(
             )
             .select_related("organization_user", "customer")
             .annotate(
-                # Annotate with total paid using Coalesce to handle None values
-                total_paid=Coalesce(
-                    Subquery(total_paid_subquery),
-                    Decimal("0"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
-                # Annotate with total sales using Coalesce to handle None values
-                total_sales=Coalesce(
-                    Subquery(total_sales_subquery),
-                    Decimal("0"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
-                # Calculate remaining balance
-                total_due=ExpressionWrapper(
-                    F("total_sales") - F("total_paid"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
                 # Payment progress percentage (how much of total sales is paid)
                 payment_progress=Case(
                     When(
@@ -234,7 +129,7 @@ class OrgCustomerFacturationListView(
                 ),
             )
             # .filter(
-            #     remaining_balance__gt=0  # Only get facturations with positive balance
+            #     balance__gt=0  # Only get facturations with positive balance
             # )
             .order_by("placed_at")
         )
@@ -407,11 +302,9 @@ class OrgBatchListView(
         return ["orders/batch_list.html"]
 
     def get_queryset(self):
-        return models.Batch.objects.filter(
-            organization__in=self.request.organization.get_descendants(
-                include_self=True
-            )
-        ).order_by("item__name")
+        return models.Batch.objects.for_subtree(self.request.organization).order_by(
+            "item__name"
+        )
 
 
 class OrgBatchAddView(
@@ -735,11 +628,9 @@ class OrgItemListView(
         return ["orders/item_list.html"]
 
     def get_queryset(self):
-        return models.Item.objects.filter(
-            organization__in=self.request.organization.get_descendants(
-                include_self=True
-            )
-        ).order_by("name")
+        return models.Item.objects.for_subtree(self.request.organization).order_by(
+            "name"
+        )
 
 
 class OrgItemAddView(
@@ -900,11 +791,9 @@ class OrgSupplierListView(
         return ["orders/supplier_list.html"]
 
     def get_queryset(self):
-        return models.Supplier.objects.filter(
-            organization__in=self.request.organization.get_descendants(
-                include_self=True
-            )
-        ).order_by("-created")
+        return models.Supplier.objects.for_subtree(self.request.organization).order_by(
+            "-created"
+        )
 
 
 class OrgSupplierAddView(
@@ -1067,11 +956,9 @@ class OrgCategoryListView(
         return ["orders/category_list.html"]
 
     def get_queryset(self):
-        return models.Category.objects.filter(
-            organization__in=self.request.organization.get_descendants(
-                include_self=True
-            )
-        ).order_by("-created")
+        return models.Category.objects.for_subtree(self.request.organization).order_by(
+            "-created"
+        )
 
     def render_to_response(self, context, **response_kwargs):
         response = super().render_to_response(context, **response_kwargs)
@@ -1242,51 +1129,9 @@ class OrgFacturationListView(
         return ["orders/facturation_list.html"]
 
     def get_queryset(self):
-        # Subquery to calculate total paid for each facturation
-        total_paid_subquery = (
-            models.FacturationPayment.objects.filter(facturation_id=OuterRef("pk"))
-            .values("facturation_id")
-            .annotate(
-                total=Sum(
-                    "amount", output_field=DecimalField(max_digits=19, decimal_places=4)
-                )
-            )
-            .values("total")[:1]
-        )
-
-        # Subquery to calculate total sales (unit_price * quantity) for each facturation
-        total_sales_subquery = (
-            models.FacturationStock.objects.filter(facturation_id=OuterRef("pk"))
-            .values("facturation_id")
-            .annotate(
-                total=Sum(
-                    F("unit_price") * F("quantity"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                )
-            )
-            .values("total")[:1]
-        )
-
         return (
             models.Facturation.objects.filter(organization=self.request.organization)
             .annotate(
-                # Annotate with total paid using Coalesce to handle None values
-                total_paid=Coalesce(
-                    Subquery(total_paid_subquery),
-                    Decimal("0"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
-                # Annotate with total sales using Coalesce to handle None values
-                total_sales=Coalesce(
-                    Subquery(total_sales_subquery),
-                    Decimal("0"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
-                # Calculate remaining balance
-                remaining_balance=ExpressionWrapper(
-                    F("total_sales") - F("total_paid"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
                 # Payment progress percentage (how much of total sales is paid)
                 payment_progress=Case(
                     When(
@@ -1465,10 +1310,16 @@ class OrgFacturationDeliverView(
             self.object.save()
 
             # Update quantity of each product in stock for each batch in the facturation
+            deltas = defaultdict(int)
             for facturation_stock in batchs:
-                stock = facturation_stock.stock
-                stock.quantity -= facturation_stock.quantity
-                stock.save()
+                deltas[facturation_stock.stock_id] -= facturation_stock.quantity
+            models.Stock.move(
+                deltas,
+                models.StockMovementKind.DELIVERY,
+                self.object.organization_id,
+                organization_user_id=self.request.organization_user.pk,
+                facturation_id=self.object.pk,
+            )
             messages.error(self.request, f"{self.object} delivered successfully")
 
         if request.headers.get("HX-Request"):
@@ -2603,72 +2454,6 @@ class OrgBulkCreditPaymentCreateView(
         )
         return kwargs
 
-    def _get_unpaid_facturations(self, customer):
-        """
-        Get unpaid facturations using subqueries to calculate:
-        - total_paid: Sum of all payments for the facturation
-        - total_sales: Sum of (unit_price * quantity) for all facturation_stocks
-        """
-
-        # Subquery to calculate total paid for each facturation
-        total_paid_subquery = (
-            models.FacturationPayment.objects.filter(facturation_id=OuterRef("pk"))
-            .values("facturation_id")
-            .annotate(
-                total=Sum(
-                    "amount", output_field=DecimalField(max_digits=19, decimal_places=4)
-                )
-            )
-            .values("total")[:1]
-        )
-
-        # Subquery to calculate total sales (unit_price * quantity) for each facturation
-        total_sales_subquery = (
-            models.FacturationStock.objects.filter(facturation_id=OuterRef("pk"))
-            .values("facturation_id")
-            .annotate(
-                total=Sum(
-                    F("unit_price") * F("quantity"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                )
-            )
-            .values("total")[:1]
-        )
-
-        # Get facturations with annotations
-        unpaid_facturations = (
-            models.Facturation.objects.filter(
-                organization=self.request.organization,
-                customer=customer,
-                is_proforma=False,
-            )
-            .annotate(
-                # Annotate with total paid using Coalesce to handle None values
-                total_paid=Coalesce(
-                    Subquery(total_paid_subquery),
-                    Decimal("0"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
-                # Annotate with total sales using Coalesce to handle None values
-                total_sales=Coalesce(
-                    Subquery(total_sales_subquery),
-                    Decimal("0"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
-                # Calculate remaining balance
-                remaining_balance=ExpressionWrapper(
-                    F("total_sales") - F("total_paid"),
-                    output_field=DecimalField(max_digits=19, decimal_places=4),
-                ),
-            )
-            .filter(
-                remaining_balance__gt=0  # Only get facturations with positive balance
-            )
-            .order_by("placed_at")
-        )  # Oldest first (FIFO)
-
-        return unpaid_facturations
-
     def form_valid(self, form):
         with transaction.atomic():
             bulk_credit_payment = form.save(commit=False)
@@ -2676,52 +2461,15 @@ class OrgBulkCreditPaymentCreateView(
             bulk_credit_payment.save()
 
             customer = bulk_credit_payment.customer
+            allocations = bulk_credit_payment.allocate()
 
-            # Get unpaid facturations
-            unpaid_facturations = self._get_unpaid_facturations(customer)
-
-            if not unpaid_facturations:
+            if not allocations:
                 messages.warning(
                     self.request,
                     f"Le client {customer.name} n'a aucune facture impayée.",
                 )
-                # You might want to redirect or handle this case
                 return self.form_invalid(form)
 
-            # Calculate total outstanding
-            # total_outstanding = sum(
-            #     facturation.remaining_balance for facturation in unpaid_facturations
-            # )
-
-            # Allocate payments
-            remaining_amount = bulk_credit_payment.amount
-            allocations = {}
-            payments_to_create = []
-
-            for facturation in unpaid_facturations:
-                if remaining_amount <= 0:
-                    break
-
-                allocate_amount = min(remaining_amount, facturation.remaining_balance)
-
-                if allocate_amount > 0:
-                    payments_to_create.append(
-                        models.FacturationPayment(
-                            facturation=facturation,
-                            organization=facturation.organization,
-                            bulk_credit_payment=bulk_credit_payment,
-                            organization_user=self.request.organization_user,
-                            transaction_broker=bulk_credit_payment.transaction_broker,
-                            amount=allocate_amount,
-                        )
-                    )
-                    allocations[facturation.id] = allocate_amount
-                    remaining_amount -= allocate_amount
-
-            # Bulk create payments
-            if payments_to_create:
-                models.FacturationPayment.objects.bulk_create(payments_to_create)
-
             # Create transaction
             models.Transaction.objects.create(
                 organization=self.request.organization,
@@ -2737,23 +2485,17 @@ class OrgBulkCreditPaymentCreateView(
             total_allocated = sum(allocations.values())
             leftover = bulk_credit_payment.amount - total_allocated
 
-            if total_allocated > 0:
-                messages.success(
-                    self.request,
-                    f"Paiement de {total_allocated} attribué à {len(allocations)} facture(s).",
-                )
+            messages.success(
+                self.request,
+                f"Paiement de {total_allocated} attribué à {len(allocations)} facture(s).",
+            )
 
             if leftover > 0:
-                customer.prepaid_amount = customer.prepaid_amount + leftover
-                customer.save()
                 messages.info(
                     self.request,
                     f"Montant restant: {leftover}. Créé comme crédit client.",
                 )
 
-            # Store for success page
-            # self.request.session["last_bulk_payment_id"] = bulk_credit_payment.id
-
         return HttpResponseRedirect(self.get_success_url())
 
     def get_context_data(self, **kwargs):
@@ -1,3 +1,5 @@
+from django.utils.functional import SimpleLazyObject
+
 # PermWrapper and PermLookupDict proxy the permissions system into objects that
 # the template system can understand.
 
@@ -58,7 +60,9 @@ def auth(request):
         organization_user = request.organization_user
         return {
             "organization_user": organization_user,
-            "organization_user_perms": organization_user.get_all_permissions(),
+            "organization_user_perms": SimpleLazyObject(
+                organization_user.get_all_permissions
+            ),
         }
     else:
         from django.contrib.auth.models import AnonymousUser
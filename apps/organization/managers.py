@@ -36,6 +36,18 @@ class OrgFeatureMixin(object):
             organization = get_object_or_404(Organization, slug=organization)
         return self.get_queryset().filter(organization=organization)
 
+    def for_subtree(self, organization):
+        """
+        Rows of ``organization`` and its descendants. With a fast cache the
+        cached primary keys of the subtree are inlined, so the tree is not
+        queried again.
+        """
+        from .resolvers import get_subtree_ids
+
+        return self.get_queryset().filter(
+            organization_id__in=get_subtree_ids(organization)
+        )
+
 
 class OrgFeatureQuerySet(QuerySet, OrgFeatureMixin):
     pass
@@ -1,9 +1,8 @@
 import zoneinfo
 
-from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
-from apps.organization.models import Organization, OrganizationUser
+from apps.organization import resolvers
 
 
 class OrganizationMiddleware:
@@ -21,22 +20,15 @@ class OrganizationMiddleware:
 
             request.organization_slug = organization_slug
             # Get the organization object in the class that we use
-            organization = get_object_or_404(Organization, slug=organization_slug)
+            organization = resolvers.get_organization(organization_slug)
 
             request.organization = organization
 
-            # In the case of a POST request, we also change the payload and
-            # add the organization, so it's available for the forms.
-            if request.method == "POST":
-                # Since the original is immutable, we make a copy
-                request.POST = request.POST.copy()
-                # request.POST["organization"] = organization
-
             # If we are logged in, try getting the organization user we currently are using
             if not request.user.is_anonymous:
-                organization_user = OrganizationUser.objects.filter(
-                    organization=organization, user=request.user
-                ).first()
+                organization_user = resolvers.get_organization_user(
+                    organization.pk, request.user.pk
+                )
                 if organization_user:
                     request.organization_user = organization_user
 
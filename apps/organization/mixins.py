@@ -3,7 +3,7 @@ from django.core.exceptions import PermissionDenied
 from django.utils.translation import gettext_lazy as _
 
 # views.py
-from apps.organization.models import OrganizationUser
+from apps.organization import resolvers
 
 
 class OrganizationAPIUserMixin:
@@ -16,9 +16,9 @@ class OrganizationAPIUserMixin:
 
         if hasattr(request, "organization"):
             if request.user and request.user.is_authenticated:
-                organization_user = OrganizationUser.objects.filter(
-                    organization=request.organization, user=request.user
-                ).first()
+                organization_user = resolvers.get_organization_user(
+                    request.organization.pk, request.user.pk
+                )
 
                 if organization_user:
                     request.organization_user = organization_user
@@ -1,6 +1,8 @@
+import uuid
 from functools import cached_property
 
 from django.contrib.auth.models import Permission
+from django.core.cache import cache
 from django.db import models
 from django.utils.itercompat import is_iterable
 from django.utils.translation import gettext_lazy as _
@@ -89,14 +91,9 @@ class Organization(MPTTModel, AbstractOrganization, BaseModel, metaclass=CommonM
 
     @property
     def current_subscription(self):
-        from apps.subscriptions.models import Subscription
+        from apps.subscriptions.entitlements import get_entitlement
 
-        return (
-            Subscription.objects.filter(organization=self.pk)
-            .prefetch_related("plan__plan_features")
-            .last()
-            or None
-        )
+        return get_entitlement(self).subscription
 
     class Meta:
         permissions = [
@@ -167,9 +164,40 @@ class PermissionMixins(BaseModel):
         ),
     )
 
+    PERMISSION_CACHE_TIMEOUT = 60 * 60
+
     class Meta:
         abstract = True
 
+    @staticmethod
+    def permission_version_key(organization_id):
+        return f"organization:{organization_id}:permissions-version"
+
+    @classmethod
+    def invalidate_permissions(cls, organization_ids):
+        """
+        Drop the cached permission sets of every user of the organizations:
+        their keys embed the organization's version token, which is replaced.
+        """
+        cache.delete_many([cls.permission_version_key(pk) for pk in organization_ids])
+
+    def _load_permission_set(self):
+        version = cache.get_or_set(
+            self.permission_version_key(self.organization_id),
+            uuid.uuid4().hex,
+            timeout=None,
+        )
+        key = f"organization-user:{self.pk}:permissions:{version}"
+        perms = cache.get(key)
+        if perms is None:
+            user_perms = self.permissions.all()
+            group_perms = Permission.objects.filter(
+                organizationgroup__organization_user_groups__user=self
+            )
+            perms = self._create_permission_set(user_perms | group_perms)
+            cache.set(key, perms, self.PERMISSION_CACHE_TIMEOUT)
+        return perms
+
     def _create_permission_set(self, perms=None):
         """
         Expects a queryset of permissions, returns a formatted
@@ -224,11 +252,13 @@ class PermissionMixins(BaseModel):
         return self._create_permission_set(group_perms)
 
     def get_all_permissions(self, obj=None):
-        user_perms = self.permissions.all()
-        groups = self.groups.all()
-        group_perms = Permission.objects.filter(organizationgroup__in=groups)
-        perms = user_perms | group_perms
-        return self._create_permission_set(perms)
+        """
+        The permission strings of the user and their groups, read once per
+        instance (so once per request) from the cache.
+        """
+        if not hasattr(self, "_perm_cache"):
+            self._perm_cache = self._load_permission_set()
+        return self._perm_cache
 
     def has_perms(self, perms, obj=None):
         """
@@ -245,7 +275,8 @@ class PermissionMixins(BaseModel):
         # Active superusers have all permissions.
         if self.is_active and self.is_superuser:
             return True
-        return any(perm in list(self.get_all_permissions(obj=obj)) for perm in perms)
+        all_perms = self.get_all_permissions(obj=obj)
+        return any(perm in all_perms for perm in perms)
 
     def has_module_perms(self, app_label):
         """
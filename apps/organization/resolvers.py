@@ -0,0 +1,157 @@
+"""
+Cached resolution of the organization and membership of a request.
+
+Organizations are looked up in a small in-process LRU, then the shared cache,
+then the database. Saving or deleting an organization drops its entries from
+the shared cache and from the LRU of the current process; the LRUs of other
+processes expire after ``LOCAL_TTL`` seconds.
+
+Memberships skip the LRU, so that a removed or deactivated organization user
+is denied on its next request whatever the process serving it, and only
+existing memberships are cached.
+
+The primary keys of the subtree of an organization are cached in the shared
+cache under a tree version that saving or deleting any organization bumps,
+as moving a node changes the subtrees of all its old and new ancestors. With
+the database cache fallback, whose reads are queries too, the subtree stays
+an MPTT subquery instead.
+"""
+
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.db import DatabaseCache
+from django.shortcuts import get_object_or_404
+
+from apps.organization.models import Organization, OrganizationUser
+
+LOCAL_TTL = 30
+SHARED_TIMEOUT = 10 * 60
+
+MISSING = object()
+
+TREE_VERSION_KEY = "organization:tree-version"
+
+
+class LRUCache:
+    """A thread-safe mapping keeping the ``maxsize`` latest entries for ``ttl``s."""
+
+    def __init__(self, maxsize=512, ttl=LOCAL_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return MISSING
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_cache = LRUCache()
+
+
+def organization_key(slug):
+    return f"organization:slug:{slug}"
+
+
+def membership_key(organization_id, user_id):
+    return f"organization:{organization_id}:member:{user_id}"
+
+
+def subtree_key(organization_id):
+    version = cache.get_or_set(TREE_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    return f"organization:tree:{version}:{organization_id}:subtree"
+
+
+def get_organization(slug):
+    """The organization of ``slug``, raising ``Http404`` when there is none."""
+    key = organization_key(slug)
+    organization = local_cache.get(key)
+    if organization is MISSING:
+        organization = cache.get(key)
+        if organization is None:
+            organization = get_object_or_404(Organization, slug=slug)
+            cache.set(key, organization, SHARED_TIMEOUT)
+        local_cache.set(key, organization)
+    # Requests get their own copy: views may set attributes on it.
+    return copy.copy(organization)
+
+
+def get_organization_user(organization_id, user_id):
+    """The membership of a user in an organization, or ``None``."""
+    key = membership_key(organization_id, user_id)
+    organization_user = cache.get(key)
+    if organization_user is None:
+        organization_user = OrganizationUser.objects.filter(
+            organization_id=organization_id, user_id=user_id
+        ).first()
+        if organization_user is not None:
+            cache.set(key, organization_user, SHARED_TIMEOUT)
+    return organization_user
+
+
+def forget(*keys):
+    cache.delete_many(keys)
+    for key in keys:
+        local_cache.delete(key)
+
+
+def has_fast_cache():
+    """Whether reading the shared cache is cheaper than a query."""
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], DatabaseCache)
+
+
+def get_subtree_ids(organization):
+    """
+    The primary keys of ``organization`` and its descendants, for ``__in``
+    lookups: a cached list memoized on the organization for the rest of the
+    request, or a subquery without a fast cache.
+    """
+    if not has_fast_cache():
+        return organization.get_descendants(include_self=True).values_list(
+            "pk", flat=True
+        )
+    subtree_ids = getattr(organization, "_subtree_ids", None)
+    if subtree_ids is None:
+        key = subtree_key(organization.pk)
+        subtree_ids = cache.get(key)
+        if subtree_ids is None:
+            subtree_ids = list(
+                organization.get_descendants(include_self=True).values_list(
+                    "pk", flat=True
+                )
+            )
+            cache.set(key, subtree_ids, SHARED_TIMEOUT)
+        organization._subtree_ids = subtree_ids
+    return subtree_ids
+
+
+def forget_subtrees():
+    cache.delete(TREE_VERSION_KEY)
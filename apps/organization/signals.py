@@ -1,3 +1,14 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from mptt.signals import node_moved
+
+from apps.organization import resolvers
+from apps.organization.models import (
+    Organization,
+    OrganizationGroup,
+    OrganizationUser,
+    OrganizationUserGroup,
+)
+
 # from organization.models.inventory import Inventory, Location, Product
 
 # Create a notification every time a new Location or Product is created within
@@ -22,3 +33,144 @@
 #             sender=sender,
 #             organization=instance.organization,
 # )
+
+
+def invalidate_membership_permissions(sender, instance, **kwargs):
+    OrganizationUser.invalidate_permissions(
+        OrganizationGroup.objects.filter(pk=instance.group_id).values_list(
+            "organization_id", flat=True
+        )
+    )
+
+
+def invalidate_after(action, instance, organization_ids):
+    """
+    Invalidate the organizations once the relation changed. A clear sends no
+    ``pk_set``, so its organizations are collected before the rows go.
+    """
+    if action == "pre_clear":
+        instance._cleared_organization_ids = list(organization_ids)
+    elif action == "post_clear":
+        OrganizationUser.invalidate_permissions(
+            instance.__dict__.pop("_cleared_organization_ids", ())
+        )
+    elif action.startswith("post_"):
+        OrganizationUser.invalidate_permissions(organization_ids)
+
+
+def invalidate_group_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        groups = OrganizationGroup.objects.filter(pk=instance.pk)
+    elif pk_set is None:
+        # Permission.organizationgroup_set cleared: the groups holding it.
+        groups = OrganizationGroup.objects.filter(permissions=instance)
+    else:
+        # Permission.organizationgroup_set changed: ``pk_set`` holds groups.
+        groups = OrganizationGroup.objects.filter(pk__in=pk_set)
+    invalidate_after(
+        action,
+        instance,
+        groups.values_list("organization_id", flat=True).distinct(),
+    )
+
+
+def invalidate_user_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        users = OrganizationUser.objects.filter(pk=instance.pk)
+    elif pk_set is None:
+        # Permission.organizationuser_set cleared: the users holding it.
+        users = OrganizationUser.objects.filter(permissions=instance)
+    else:
+        # Permission.organizationuser_set changed: ``pk_set`` holds users.
+        users = OrganizationUser.objects.filter(pk__in=pk_set)
+    invalidate_after(
+        action,
+        instance,
+        users.values_list("organization_id", flat=True).distinct(),
+    )
+
+
+def invalidate_user_group_permissions(sender, instance, action, **kwargs):
+    # The user or, from the reverse side, the group: both belong to the
+    # organization whose permission sets change.
+    invalidate_after(action, instance, [instance.organization_id])
+
+
+post_save.connect(
+    invalidate_membership_permissions,
+    sender=OrganizationUserGroup,
+    dispatch_uid="permissions_membership_saved",
+)
+post_delete.connect(
+    invalidate_membership_permissions,
+    sender=OrganizationUserGroup,
+    dispatch_uid="permissions_membership_deleted",
+)
+m2m_changed.connect(
+    invalidate_group_permissions,
+    sender=OrganizationGroup.permissions.through,
+    dispatch_uid="permissions_group_permissions",
+)
+m2m_changed.connect(
+    invalidate_user_permissions,
+    sender=OrganizationUser.permissions.through,
+    dispatch_uid="permissions_user_permissions",
+)
+m2m_changed.connect(
+    invalidate_user_group_permissions,
+    sender=OrganizationUserGroup,
+    dispatch_uid="permissions_user_groups",
+)
+
+
+def forget_organization_slug(sender, instance, **kwargs):
+    # The slug may be about to change: forget the one stored in the database.
+    slugs = Organization.objects.filter(pk=instance.pk).values_list("slug", flat=True)
+    resolvers.forget(*(resolvers.organization_key(slug) for slug in slugs))
+
+
+def forget_organization(sender, instance, **kwargs):
+    resolvers.forget(resolvers.organization_key(instance.slug))
+
+
+def forget_subtrees(sender, instance, **kwargs):
+    resolvers.forget_subtrees()
+
+
+def forget_membership(sender, instance, **kwargs):
+    resolvers.forget(
+        resolvers.membership_key(instance.organization_id, instance.user_id)
+    )
+
+
+pre_save.connect(
+    forget_organization_slug,
+    sender=Organization,
+    dispatch_uid="resolvers_organization_saving",
+)
+post_save.connect(
+    forget_organization, sender=Organization, dispatch_uid="resolvers_organization"
+)
+post_delete.connect(
+    forget_organization,
+    sender=Organization,
+    dispatch_uid="resolvers_organization_deleted",
+)
+post_save.connect(
+    forget_subtrees, sender=Organization, dispatch_uid="resolvers_subtrees"
+)
+post_delete.connect(
+    forget_subtrees, sender=Organization, dispatch_uid="resolvers_subtrees_deleted"
+)
+# ``move_to`` moves nodes without saving them.
+node_moved.connect(
+    forget_subtrees, sender=Organization, dispatch_uid="resolvers_subtrees_moved"
+)
+post_save.connect(
+    forget_membership, sender=OrganizationUser, dispatch_uid="resolvers_membership"
+)
+post_delete.connect(
+    forget_membership,
+    sender=OrganizationUser,
+    dispatch_uid="resolvers_membership_deleted",
+)
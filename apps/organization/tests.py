@@ -0,0 +1,42 @@
+from unittest import mock
+
+from django.test import RequestFactory
+
+from apps.core.testing import OrganizationTestCase
+from apps.organization import resolvers
+from apps.organization.middleware import OrganizationMiddleware
+
+
+class MembershipResolutionTests(OrganizationTestCase):
+    """Changes to a membership apply to the next request of every process."""
+
+    def resolve(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        OrganizationMiddleware(lambda request: None).process_view(
+            request, None, (), {"organization": self.organization.slug}
+        )
+        return getattr(request, "organization_user", None)
+
+    def other_process(self):
+        # Signals only clear the in-process cache of the process saving.
+        return mock.patch.object(resolvers.local_cache, "delete", lambda key: None)
+
+    def test_removed_user_is_denied_on_the_next_request(self):
+        self.assertEqual(self.resolve(), self.organization_user)
+        with self.other_process():
+            self.organization_user.delete()
+        self.assertIsNone(self.resolve())
+
+    def test_deactivated_user_is_inactive_on_the_next_request(self):
+        self.assertTrue(self.resolve().is_active)
+        with self.other_process():
+            self.organization_user.is_active = False
+            self.organization_user.save()
+        self.assertFalse(self.resolve().is_active)
+
+    def test_new_member_is_allowed_on_the_next_request(self):
+        self.organization_user.delete()
+        self.assertIsNone(self.resolve())
+        self.organization_user.save()
+        self.assertEqual(self.resolve(), self.organization_user)
@@ -0,0 +1,10 @@
+from apps.core.filters import BaseFilter
+
+
+class DailySalesFilter(BaseFilter):
+    """The period filters of ``BaseFilter``, applied to the rollup day."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in ("date_field", "created", "date_range"):
+            self.filters[name].field_name = "day"
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from apps.organization.models import Organization
+from apps.reports.models import DailySales, SubtreeSales
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the daily sales rollups and their subtree totals. Reports "
+        "only read them: run it on a schedule, at least nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--organization", help="Only refresh the subtree of this slug"
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Rebuild every day, e.g. after organizations moved in the tree",
+        )
+
+    def handle(self, *args, **options):
+        roots = Organization.objects.filter(parent__isnull=True)
+        if options["organization"]:
+            roots = Organization.objects.filter(slug=options["organization"])
+
+        for root in roots:
+            if options["rebuild"]:
+                subtree = list(
+                    root.get_descendants(include_self=True).values_list("pk", flat=True)
+                )
+                for organization_id in subtree:
+                    DailySales.rebuild(organization_id, consolidate=False)
+                SubtreeSales.consolidate(subtree)
+            else:
+                SubtreeSales.refresh(root)
+            self.stdout.write(f"Refreshed the sales rollups of {root}")
+        self.stdout.write(self.style.SUCCESS("Sales rollups are up to date."))
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.3 on 2026-10-16 23:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0002_initial'),
+        ('reports', '0001_daily_sales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubtreeSales',
+            fields=[
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('day', models.DateTimeField()),
+                ('lines', models.PositiveIntegerField(default=0)),
+                ('quantity', models.IntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=4, default=0, max_digits=19)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subtree_sales', to='organization.organization')),
+            ],
+            options={
+                'unique_together': {('organization', 'day')},
+            },
+        ),
+    ]
@@ -1,3 +1,297 @@
-from django.db import models
+from collections import defaultdict
+from datetime import timedelta
 
-# Create your models here.
+from django.db import models, transaction
+from django.db.models import Count, Exists, F, Min, OuterRef, Q, Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+from apps.core.models import BaseModel
+from apps.orders.models import Facturation, FacturationStock
+from apps.organization import resolvers
+from apps.organization.models import Organization, OrganizationUser
+
+
+class SalesRollup(BaseModel):
+    """How far the daily sales rollups of an organization are up to date."""
+
+    organization = models.OneToOneField(
+        Organization, on_delete=models.CASCADE, related_name="sales_rollup"
+    )
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.organization_id} | {self.refreshed_at}"
+
+
+class DailySales(BaseModel):
+    """
+    Facturation lines of a closed day, summed per seller and item.
+
+    Rows are rebuilt per day from the lines, so refreshing a day twice is
+    harmless. Today's sales are never rolled up: reports add them from the
+    raw lines, which keeps period reports off the bulk of the line table.
+    """
+
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    # Local midnight of the day the facturations were placed.
+    day = models.DateTimeField()
+    organization_user = models.ForeignKey(
+        OrganizationUser, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    item = models.ForeignKey(
+        "orders.Item", on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    category = models.ForeignKey(
+        "orders.Category", on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    lines = models.PositiveIntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=19, decimal_places=4, default=0)
+
+    # Facturations modified this long before the last refresh are looked at
+    # again, covering writers that committed after it started.
+    REFRESH_OVERLAP = timedelta(minutes=10)
+    # Reports read the days not rolled up yet from the raw lines, but never
+    # more days than this, today included: refresh_sales_rollups runs on a
+    # schedule to keep the rollups within it.
+    RAW_DAYS = 2
+
+    class Meta:
+        unique_together = ("organization", "day", "organization_user", "item")
+        indexes = [
+            models.Index(
+                fields=["organization", "day"], name="reports_daily_sales_day"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day:%Y-%m-%d} | {self.item_id} | {self.amount}"
+
+    @staticmethod
+    def day_start(moment=None):
+        """Local midnight of the day of ``moment`` (now by default)."""
+        return timezone.localtime(moment).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+    @classmethod
+    def rebuild(cls, organization_id, days=None, consolidate=True):
+        """
+        Recompute the rollups of ``days`` (dates, all days when ``None``) and,
+        unless ``consolidate`` is false, the subtree totals above them.
+        """
+        sales_lines = FacturationStock.objects.filter(
+            facturation__organization_id=organization_id,
+            facturation__created__lt=cls.day_start(),
+        )
+        rollups = cls.objects.filter(organization_id=organization_id)
+        if days is not None:
+            if not days:
+                return
+            sales_lines = sales_lines.filter(facturation__created__date__in=days)
+            rollups = rollups.filter(day__date__in=days)
+
+        totals = (
+            sales_lines.order_by()
+            .values(
+                day=TruncDay("facturation__created"),
+                user_id=F("facturation__organization_user_id"),
+                item_id=F("stock__batch__item_id"),
+                category_id=F("stock__batch__item__category_id"),
+            )
+            .annotate(
+                line_count=Count("pk"),
+                total_quantity=Sum("quantity"),
+                total_amount=Sum(F("unit_price") * F("quantity")),
+            )
+        )
+        with transaction.atomic():
+            rollups.delete()
+            cls.objects.bulk_create(
+                (
+                    cls(
+                        organization_id=organization_id,
+                        day=row["day"],
+                        organization_user_id=row["user_id"],
+                        item_id=row["item_id"],
+                        category_id=row["category_id"],
+                        lines=row["line_count"],
+                        quantity=row["total_quantity"],
+                        amount=row["total_amount"],
+                    )
+                    for row in totals.iterator()
+                ),
+                batch_size=1000,
+            )
+            if consolidate:
+                SubtreeSales.consolidate([organization_id], days)
+
+    @classmethod
+    def refresh(cls, organization_id, consolidate=True):
+        """
+        Bring the closed days of an organization up to date: only the days
+        closed since the last refresh, or holding facturations modified since
+        then, are rebuilt. Returns the rebuilt days, ``None`` meaning all.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            SalesRollup.objects.get_or_create(organization_id=organization_id)
+            state = SalesRollup.objects.select_for_update().get(
+                organization_id=organization_id
+            )
+            if state.refreshed_at is None:
+                days = None
+            else:
+                changed = Facturation.objects.filter(
+                    Q(modified__gt=state.refreshed_at - cls.REFRESH_OVERLAP)
+                    | Q(created__gte=cls.day_start(state.refreshed_at)),
+                    organization_id=organization_id,
+                    created__lt=cls.day_start(),
+                )
+                days = list(changed.dates("created", "day"))
+            cls.rebuild(organization_id, days, consolidate)
+            state.refreshed_at = now
+            state.save(update_fields=["refreshed_at", "modified"])
+        return days
+
+
+class SubtreeSales(BaseModel):
+    """
+    Sales of a closed day summed over an organization and its descendants.
+
+    Totals are consolidated bottom-up along the ``parent`` tree: a node adds
+    its own daily rollups to the subtree totals of its children, so a general
+    direction reads one row per day whatever the number of its agencies.
+    """
+
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="subtree_sales"
+    )
+    # Local midnight of the day, as in DailySales.
+    day = models.DateTimeField()
+    lines = models.PositiveIntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=19, decimal_places=4, default=0)
+
+    class Meta:
+        unique_together = ("organization", "day")
+
+    def __str__(self) -> str:
+        return f"{self.day:%Y-%m-%d} | {self.organization_id} | {self.amount}"
+
+    @classmethod
+    def consolidate(cls, organization_ids, days=None):
+        """
+        Recompute the totals of ``days`` (all days when ``None``) for the
+        given organizations and all their ancestors, deepest level first.
+        """
+        if days is not None and not days:
+            return
+        nodes = Organization.objects.filter(pk__in=organization_ids)
+        levels = defaultdict(list)
+        for pk, level in Organization._tree_manager.get_queryset_ancestors(
+            nodes, include_self=True
+        ).values_list("pk", "level"):
+            levels[level].append(pk)
+
+        sums = {
+            "total_lines": Sum("lines"),
+            "total_quantity": Sum("quantity"),
+            "total_amount": Sum("amount"),
+        }
+        with transaction.atomic():
+            for level in sorted(levels, reverse=True):
+                node_ids = levels[level]
+                own = DailySales.objects.filter(organization_id__in=node_ids)
+                children = cls.objects.filter(organization__parent_id__in=node_ids)
+                totals = cls.objects.filter(organization_id__in=node_ids)
+                if days is not None:
+                    own = own.filter(day__date__in=days)
+                    children = children.filter(day__date__in=days)
+                    totals = totals.filter(day__date__in=days)
+
+                consolidated = defaultdict(lambda: [0, 0, 0])
+                for rows in (
+                    own.order_by().values_list("organization_id", "day"),
+                    children.order_by().values_list("organization__parent_id", "day"),
+                ):
+                    for node_id, day, lines, quantity, amount in rows.annotate(**sums):
+                        total = consolidated[node_id, day]
+                        total[0] += lines
+                        total[1] += quantity
+                        total[2] += amount
+
+                totals.delete()
+                cls.objects.bulk_create(
+                    (
+                        cls(
+                            organization_id=node_id,
+                            day=day,
+                            lines=lines,
+                            quantity=quantity,
+                            amount=amount,
+                        )
+                        for (node_id, day), (lines, quantity, amount) in (
+                            consolidated.items()
+                        )
+                    ),
+                    batch_size=1000,
+                )
+
+    @classmethod
+    def rolled_up_until(cls, organization):
+        """
+        Local midnight before which the rollups of the subtree are complete,
+        bounded to the last ``DailySales.RAW_DAYS`` days. Reports take the
+        later days from the raw lines.
+        """
+        floor = DailySales.day_start() - timedelta(days=DailySales.RAW_DAYS - 1)
+        refreshes = Organization.objects.filter(
+            pk__in=resolvers.get_subtree_ids(organization)
+        ).aggregate(
+            oldest=Min("sales_rollup__refreshed_at"),
+            never=Count("pk", filter=Q(sales_rollup__refreshed_at__isnull=True)),
+        )
+        if refreshes["never"] or refreshes["oldest"] is None:
+            return floor
+        return max(DailySales.day_start(refreshes["oldest"]), floor)
+
+    @classmethod
+    def refresh(cls, organization):
+        """
+        Refresh the daily rollups of the organizations of the subtree that may
+        be stale, then consolidate the rebuilt days once for all of them.
+        """
+        overlap = DailySales.REFRESH_OVERLAP
+        today_start = DailySales.day_start()
+        stale = (
+            Organization.objects.filter(pk__in=resolvers.get_subtree_ids(organization))
+            .filter(
+                Q(sales_rollup__refreshed_at__isnull=True)
+                | Q(sales_rollup__refreshed_at__lt=today_start)
+                | Exists(
+                    Facturation.objects.filter(
+                        organization_id=OuterRef("pk"),
+                        created__lt=today_start,
+                        modified__gt=OuterRef("sales_rollup__refreshed_at") - overlap,
+                    )
+                )
+            )
+            .values_list("pk", flat=True)
+        )
+
+        organization_ids = []
+        days = set()
+        for organization_id in stale:
+            rebuilt = DailySales.refresh(organization_id, consolidate=False)
+            if rebuilt is None:
+                days = None
+            elif days is not None:
+                days.update(rebuilt)
+            if rebuilt is None or rebuilt:
+                organization_ids.append(organization_id)
+        if organization_ids:
+            cls.consolidate(organization_ids, None if days is None else list(days))
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete
+from django.utils import timezone
+
+from apps.orders.models import Facturation
+from apps.organization.models import Organization
+from apps.reports.models import DailySales
+
+
+def rebuild_daily_sales(sender, instance, origin=None, **kwargs):
+    # Deleted facturations leave no modified row behind for refresh() to find.
+    if isinstance(origin, Organization):
+        return
+    if instance.created < DailySales.day_start():
+        DailySales.rebuild(
+            instance.organization_id, [timezone.localdate(instance.created)]
+        )
+
+
+post_delete.connect(
+    rebuild_daily_sales,
+    sender=Facturation,
+    dispatch_uid="daily_sales_facturation_deleted",
+)
@@ -1,3 +1,81 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from apps.core.testing import (
+    OrganizationTestCase,
+    create_organization,
+    create_organization_user,
+    create_sale,
+    create_stock,
+)
+from apps.orders import models as order_models
+from apps.reports.models import DailySales, SubtreeSales
+
+
+class SubtreeSalesTests(OrganizationTestCase):
+    """A direction reads the sales of its agencies from consolidated rollups."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.agencies = [
+            create_organization_user(create_organization(parent=cls.organization))
+            for _ in range(2)
+        ]
+        cls.yesterday = DailySales.day_start() - timedelta(days=1)
+
+    def sell(self, organization_user, quantity, day=None):
+        """A sale of ``quantity`` units at 10, placed at noon of ``day``."""
+        stock = create_stock(organization_user, price=10)
+        customer = order_models.Customer.objects.create(
+            organization=organization_user.organization, name="Client"
+        )
+        facturation = create_sale(organization_user, customer, [(stock, quantity)])
+        if day is not None:
+            order_models.Facturation.objects.filter(pk=facturation.pk).update(
+                created=day + timedelta(hours=12)
+            )
+        return facturation
+
+    def totals(self, organization):
+        return list(
+            SubtreeSales.objects.filter(organization=organization).values_list(
+                "day", "lines", "quantity", "amount"
+            )
+        )
+
+    def test_closed_days_are_consolidated_up_the_tree(self):
+        self.sell(self.organization_user, 1, self.yesterday)
+        for quantity, agency in enumerate(self.agencies, start=2):
+            self.sell(agency, quantity, self.yesterday)
+        self.sell(self.agencies[0], 7)
+
+        SubtreeSales.refresh(self.organization)
+        self.assertEqual(self.totals(self.organization), [(self.yesterday, 3, 6, 60)])
+        self.assertEqual(
+            self.totals(self.agencies[0].organization), [(self.yesterday, 1, 2, 20)]
+        )
+        self.assertEqual(
+            SubtreeSales.rolled_up_until(self.organization), DailySales.day_start()
+        )
+
+    def test_refresh_picks_up_changed_days(self):
+        agency = self.agencies[0]
+        facturation = self.sell(agency, 1, self.yesterday)
+        SubtreeSales.refresh(self.organization)
+
+        order_models.FacturationStock.objects.create(
+            organization=agency.organization,
+            organization_user=agency,
+            facturation=facturation,
+            stock=create_stock(agency, price=10),
+            quantity=4,
+            unit_price=10,
+        )
+        SubtreeSales.refresh(self.organization)
+        self.assertEqual(self.totals(self.organization), [(self.yesterday, 2, 5, 50)])
+
+    def test_unrefreshed_subtree_is_read_from_the_raw_lines(self):
+        self.assertEqual(
+            SubtreeSales.rolled_up_until(self.organization),
+            DailySales.day_start() - timedelta(days=DailySales.RAW_DAYS - 1),
+        )
@@ -2,12 +2,7 @@ from collections import defaultdict
 from decimal import Decimal
 
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import (
-    F,
-    Sum,
-    Value,
-)
-from django.db.models.functions import Coalesce
+from django.db.models import F, Q, Sum
 from django.shortcuts import render
 from django.views.generic import TemplateView
 
@@ -15,11 +10,57 @@ from apps.core import services
 from apps.core.filters import BaseFilter
 from apps.orders import models as order_models
 from apps.orders.filters import BaseOrganizationFilter
+from apps.organization import resolvers
 from apps.organization.mixins import (
     MembershipRequiredMixin,
 )
 from apps.organization.models import Organization
 from apps.reports import plots as report_plots
+from apps.reports.filters import DailySalesFilter
+from apps.reports.models import DailySales, SubtreeSales
+
+
+def period_sales(request):
+    """
+    The sales of the period selected in ``request.GET`` over the subtree of
+    the organization: the consolidated totals and the per agency rollups of
+    the rolled up days, and the raw lines of the later days. The rollups are
+    only read here; ``refresh_sales_rollups`` keeps them up to date.
+    """
+    organization = request.organization
+    subtree_ids = resolvers.get_subtree_ids(organization)
+    rolled_up_until = SubtreeSales.rolled_up_until(organization)
+
+    totals = DailySalesFilter(
+        request.GET,
+        queryset=SubtreeSales.objects.filter(
+            organization=organization, day__lt=rolled_up_until
+        ),
+    ).qs
+    rollups = DailySalesFilter(
+        request.GET,
+        queryset=DailySales.objects.filter(
+            organization_id__in=subtree_ids, day__lt=rolled_up_until
+        ),
+    ).qs
+    recent_facturations = BaseFilter(
+        request.GET,
+        queryset=order_models.Facturation.objects.for_subtree(organization).filter(
+            created__gte=rolled_up_until
+        ),
+    ).qs
+    recent_lines = order_models.FacturationStock.objects.filter(
+        facturation__in=recent_facturations
+    )
+    return totals, rollups, recent_lines
+
+
+def period_sales_amount(totals, recent_lines):
+    closed = totals.aggregate(total=Sum("amount"))["total"] or 0
+    recent = (
+        recent_lines.aggregate(total=Sum(F("unit_price") * F("quantity")))["total"] or 0
+    )
+    return closed + recent
 
 
 class OrgTeachingReportView(
@@ -60,23 +101,16 @@ class OrgReportView(
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        facturations = order_models.Facturation.objects.filter(
-            organization=self.request.organization
-        ).all()
+        facturations = order_models.Facturation.objects.for_subtree(
+            self.request.organization
+        )
 
         facturation_filter = BaseFilter(self.request.GET, queryset=facturations)
 
         total_facturations = facturation_filter.qs.count() or 0
 
-        total_facturation_price = (
-            facturation_filter.qs.aggregate(
-                total_price=Sum(
-                    F("facturation_stocks__unit_price")
-                    * F("facturation_stocks__quantity")
-                )
-            )["total_price"]
-            or 0.0
-        )
+        totals, rollups, recent_lines = period_sales(self.request)
+        total_facturation_price = period_sales_amount(totals, recent_lines)
 
         mixed_total_facturations = total_facturations
 
@@ -93,55 +127,43 @@ class OrgReportView(
 
         order_filter = BaseOrganizationFilter(
             self.request.GET,
-            queryset=order_models.Facturation.objects.filter(
-                organization__in=self.request.organization.get_descendants(
-                    include_self=True
-                )
+            queryset=order_models.Facturation.objects.for_subtree(
+                self.request.organization
             ),
             request=self.request,
         )
 
         # Processing inventory report
-        s = order_models.FacturationStock.objects.filter(
-            organization=self.request.organization
-        )
+        sold = defaultdict(int)
+        for item_id, quantity in (
+            rollups.order_by().values_list("item_id").annotate(total=Sum("quantity"))
+        ):
+            sold[item_id] += quantity
+        for item_id, quantity in (
+            recent_lines.order_by()
+            .values_list("stock__batch__item_id")
+            .annotate(total=Sum("quantity"))
+        ):
+            sold[item_id] += quantity
 
-        inventory = (
-            BaseFilter(self.request.GET, queryset=s)
-            .qs.values(
-                "stock__batch__item__id", "stock__batch__item__name", "stock__quantity"
+        # Sorting by item name
+        items = (
+            order_models.Item.objects.filter(
+                Q(organization=self.request.organization) | Q(pk__in=sold)
             )
-            .annotate(total_facturation=Coalesce(Sum("quantity"), Value(0)))
+            .order_by("name")
+            .values_list("id", "name", "quantity")
         )
-
-        # Merge inventories
-        merged_inventory = defaultdict(
-            lambda: {
-                "total_facturation": 0,
-                "total": 0,
+        merged_inventory = {
+            item_id: {
+                "stock__batch__item__id": item_id,
+                "stock__batch__item__name": name,
+                "stock__quantity": quantity,
+                "total_facturation": sold.get(item_id, 0),
+                "total": sold.get(item_id, 0),
             }
-        )
-
-        for inv in inventory:
-            item_id = inv["stock__batch__item__id"]
-            merged_inventory[item_id]["stock__batch__item__id"] = item_id
-            merged_inventory[item_id]["stock__batch__item__name"] = inv[
-                "stock__batch__item__name"
-            ]
-            merged_inventory[item_id]["stock__quantity"] = inv["stock__quantity"]
-            merged_inventory[item_id]["total_facturation"] = inv["total_facturation"]
-            merged_inventory[item_id]["total"] = inv["total_facturation"]
-
-        # Extend the inventory with item that has never been facturationd before
-        items = order_models.Item.objects.filter(
-            organization=self.request.organization
-        ).exclude(id__in=merged_inventory.keys())
-
-        # Sorting by item name
-        for item in items:
-            merged_inventory[item.id]["stock__batch__item__id"] = item.id
-            merged_inventory[item.id]["stock__batch__item__name"] = item.name
-            merged_inventory[item.id]["stock__quantity"] = item.quantity
+            for item_id, name, quantity in items
+        }
         inventory_list = list(merged_inventory.values())
         context["inventories"] = inventory_list
         sale_inventory_bar_plot, sale_inventory_bar_script = (
@@ -193,19 +215,14 @@ class OrgFacturationDetailedReportView(
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        facturations = order_models.Facturation.objects.filter(
-            organization=self.request.organization
-        ).all()
+        facturations = order_models.Facturation.objects.for_subtree(
+            self.request.organization
+        )
 
         facturation_filter = BaseFilter(self.request.GET, queryset=facturations)
         total_facturations = facturation_filter.qs.count() or 0
-
-        total_facturation_price = (
-            facturation_filter.qs.aggregate(
-                total_price=Sum(F("s__unit_price") * F("s__quantity"))
-            )["total_price"]
-            or 0.0
-        )
+        totals, _, recent_lines = period_sales(self.request)
+        total_facturation_price = period_sales_amount(totals, recent_lines)
 
         mixed_total_facturation_price = Decimal(total_facturation_price)
 
@@ -220,10 +237,8 @@ class OrgFacturationDetailedReportView(
 
         order_filter = BaseOrganizationFilter(
             self.request.GET,
-            queryset=order_models.Facturation.objects.filter(
-                organization__in=self.request.organization.get_descendants(
-                    include_self=True
-                )
+            queryset=order_models.Facturation.objects.for_subtree(
+                self.request.organization
             ),
         )
 
@@ -1,4 +1,6 @@
-from .models import Subscription
+from django.utils.functional import SimpleLazyObject
+
+from apps.subscriptions import entitlements
 
 
 def subscription(request):
@@ -10,21 +12,14 @@ def subscription(request):
     django.contrib.auth).
     """
     if hasattr(request, "organization_user"):
-        organization_subscription = (
-            Subscription.objects.filter(organization=request.organization)
-            .prefetch_related("plan__plan_features")
-            .last()
+        entitlement = SimpleLazyObject(
+            lambda: entitlements.get_entitlement(request.organization)
         )
-        organization_features = []
-        if organization_subscription:
-            organization_features = [
-                plan_feature.feature.name
-                for plan_feature in organization_subscription.plan.plan_features.all()
-            ]
-
         return {
-            "organization_subscription": organization_subscription,
-            "organization_features": organization_features,
+            "organization_subscription": SimpleLazyObject(
+                lambda: entitlement.subscription
+            ),
+            "organization_features": SimpleLazyObject(lambda: entitlement.features),
         }
     else:
         from django.contrib.auth.models import AnonymousUser
@@ -0,0 +1,114 @@
+"""
+What an organization's subscription currently entitles it to.
+
+The current subscription and the features of its plan are computed once and
+kept in the cache until the subscription window opens or closes, or until a
+subscription, plan, feature or plan feature changes. Within a request the
+result is memoized on the organization instance.
+
+The invalidation from the ``post_save`` and ``post_delete`` signals reaches
+every worker only because the cache is shared (see ``CACHES``): with a
+per-process cache, other workers would keep the stale entitlement until it
+expires. Changes made with queryset updates send no signal; call
+``invalidate`` after them.
+"""
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.subscriptions.models import Subscription
+
+# How long to remember that an organization has no subscription, or only an
+# expired one; a new subscription invalidates it anyway.
+IDLE_TIMEOUT = 60 * 60
+MAX_TIMEOUT = 24 * 60 * 60
+
+CATALOG_VERSION_KEY = "subscriptions:catalog-version"
+
+
+@dataclass(frozen=True)
+class Entitlement:
+    subscription: Subscription | None = None
+    features: frozenset = field(default_factory=frozenset)
+    feature_codes: frozenset = field(default_factory=frozenset)
+
+    @property
+    def is_active(self):
+        return self.subscription is not None and self.subscription.is_active
+
+    def has_feature(self, feature):
+        """
+        Whether the active subscription includes ``feature``, a feature code
+        or, as templates use them, a feature name.
+        """
+        if not self.is_active:
+            return False
+        if isinstance(feature, int):
+            return feature in self.feature_codes
+        return feature in self.features
+
+    def timeout(self):
+        """Seconds until the subscription window next opens or closes."""
+        if self.subscription is None:
+            return IDLE_TIMEOUT
+        now = timezone.now()
+        for moment in (self.subscription.start_time, self.subscription.ends_time):
+            if moment > now:
+                return min(max((moment - now) // timedelta(seconds=1), 1), MAX_TIMEOUT)
+        return IDLE_TIMEOUT
+
+
+def entitlement_key(organization_id):
+    version = cache.get_or_set(CATALOG_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    return f"subscriptions:{version}:entitlement:{organization_id}"
+
+
+def compute(organization_id):
+    subscription = (
+        Subscription.objects.filter(organization_id=organization_id)
+        .select_related("plan")
+        .order_by("start_time", "created")
+        .last()
+    )
+    if subscription is None:
+        return Entitlement()
+    features = list(
+        subscription.plan.plan_features.values_list("feature__name", "feature__code")
+    )
+    return Entitlement(
+        subscription=subscription,
+        features=frozenset(name for name, _ in features),
+        feature_codes=frozenset(code for _, code in features),
+    )
+
+
+def get_entitlement(organization):
+    """The entitlement of ``organization``, from the request memo or the cache."""
+    entitlement = getattr(organization, "_entitlement", None)
+    if entitlement is None:
+        key = entitlement_key(organization.pk)
+        entitlement = cache.get(key)
+        if entitlement is None:
+            entitlement = compute(organization.pk)
+            cache.set(key, entitlement, entitlement.timeout())
+        organization._entitlement = entitlement
+    return entitlement
+
+
+def has_feature(organization, feature):
+    return get_entitlement(organization).has_feature(feature)
+
+
+def invalidate(organization_ids=None):
+    """
+    Forget the entitlements of the organizations, or of every organization
+    when a plan or feature changed.
+    """
+    if organization_ids is None:
+        cache.delete(CATALOG_VERSION_KEY)
+    else:
+        cache.delete_many([entitlement_key(pk) for pk in organization_ids])
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+
+from apps.subscriptions import entitlements
+from apps.subscriptions.models import Feature, Plan, PlanFeature, Subscription
+
+
+def invalidate_subscription(sender, instance, **kwargs):
+    entitlements.invalidate([instance.organization_id])
+
+
+def invalidate_catalog(sender, instance, **kwargs):
+    # Plans and features are shared by many organizations and rarely change.
+    entitlements.invalidate()
+
+
+post_save.connect(
+    invalidate_subscription,
+    sender=Subscription,
+    dispatch_uid="entitlements_subscription",
+)
+post_delete.connect(
+    invalidate_subscription,
+    sender=Subscription,
+    dispatch_uid="entitlements_subscription_deleted",
+)
+for model in (Plan, Feature, PlanFeature):
+    post_save.connect(
+        invalidate_catalog,
+        sender=model,
+        dispatch_uid=f"entitlements_{model._meta.model_name}",
+    )
+    post_delete.connect(
+        invalidate_catalog,
+        sender=model,
+        dispatch_uid=f"entitlements_{model._meta.model_name}_deleted",
+    )
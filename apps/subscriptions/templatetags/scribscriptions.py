@@ -4,6 +4,7 @@ from django import template
 from django.http import QueryDict
 
 from apps.organization.models import Organization
+from apps.subscriptions import entitlements
 
 register = template.Library()
 
@@ -14,3 +15,9 @@ register = template.Library()
 #         plan=plan, feature_item=feature_item
 #     ).first()
 #     return feature_item_value.value
+
+
+@register.filter
+def has_feature(organization, feature):
+    """Whether the active subscription of ``organization`` includes ``feature``."""
+    return entitlements.has_feature(organization, feature)
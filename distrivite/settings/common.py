@@ -144,6 +144,8 @@ MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     # Add whitenoise for serving static assets in production
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    # Compress the data sync API responses
+    "apps.api.middleware.DataAPIGZipMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
@@ -199,6 +201,33 @@ AUTHENTICATION_BACKENDS = [
 
 WSGI_APPLICATION = "distrivite.wsgi.application"
 
+# Permission sets, entitlements, resolved organizations and subtrees are
+# cached and invalidated by signals: the cache must be shared by all the
+# gunicorn workers and dynos, which the default per-process memory cache is
+# not. Production uses Redis (``REDIS_URL``, set by the Heroku Redis add-on,
+# whose TLS certificate is self-signed). Without it, the fallback is the
+# database cache table (``manage.py createcachetable``): still shared, but
+# every cache read is then a query.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+            "OPTIONS": (
+                {"ssl_cert_reqs": None}
+                if os.environ["REDIS_URL"].startswith("rediss://")
+                else {}
+            ),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "distrivite_cache",
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -273,6 +302,11 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "apps.api.v1.data.renderers.ColumnarJSONRenderer",
+    ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 30,
 }